@@ -1,8 +1,22 @@
-from database.setup import create_tables
-from database.connection import get_db_connection
-from models.article import Article
-from models.author import Author
-from models.magazine import Magazine
+import argparse
+
+from database.setup import SCHEMA_VERSION, create_tables, has_search_index, rebuild_search_index, schema_version
+from database.stats import check_stats, rebuild_stats
+from database.connection import DATABASE_NAME, get_db_connection
+from models import registry
+
+def record_article(conn, author_name, magazine_name, magazine_category, article_title, article_content):
+    # Create (or reuse) the author and magazine, then the article that links them
+    author = registry.Author(name=author_name, conn=conn)
+    magazine = registry.Magazine(name=magazine_name, category=magazine_category, conn=conn)
+    registry.Article(title=article_title, content=article_content, author=author, magazine=magazine, conn=conn)
+
+    # Query the database for inserted records without writing anything back
+    return (
+        registry.Magazine.get_all_magazines(conn),
+        registry.Author.get_all_authors(conn),
+        registry.Article.get_all_articles(conn),
+    )
 
 def main():
     # Initialize the database and create tables
@@ -17,54 +31,125 @@ def main():
 
     # Connect to the database
     conn = get_db_connection()
-    cursor = conn.cursor()
-
-
-    '''
-        The following is just for testing purposes, 
-        you can modify it to meet the requirements of your implmentation.
-    '''
-
-    # Create an author
-    cursor.execute('INSERT INTO authors (name) VALUES (?)', (author_name,))
-    author_id = cursor.lastrowid # Use this to fetch the id of the newly created author
-
-    # Create a magazine
-    cursor.execute('INSERT INTO magazines (name, category) VALUES (?,?)', (magazine_name, magazine_category))
-    magazine_id = cursor.lastrowid # Use this to fetch the id of the newly created magazine
-
-    # Create an article
-    cursor.execute('INSERT INTO articles (title, content, author_id, magazine_id) VALUES (?, ?, ?, ?)',
-                   (article_title, article_content, author_id, magazine_id))
-
-    conn.commit()
-
-    # Query the database for inserted records. 
-    # The following fetch functionality should probably be in their respective models
-
-    cursor.execute('SELECT * FROM magazines')
-    magazines = cursor.fetchall()
-
-    cursor.execute('SELECT * FROM authors')
-    authors = cursor.fetchall()
-
-    cursor.execute('SELECT * FROM articles')
-    articles = cursor.fetchall()
-
+    magazines, authors, articles = record_article(
+        conn, author_name, magazine_name, magazine_category, article_title, article_content
+    )
     conn.close()
 
     # Display results
     print("\nMagazines:")
     for magazine in magazines:
-        print(Magazine(magazine["id"], magazine["name"], magazine["category"]))
+        print(magazine)
 
     print("\nAuthors:")
     for author in authors:
-        print(Author(author["id"], author["name"]))
+        print(author)
 
     print("\nArticles:")
     for article in articles:
-        print(Article(article["id"], article["title"], article["content"], article["author_id"], article["magazine_id"]))
+        print(article)
+
+def rebuild_search():
+    create_tables()
+    conn = get_db_connection()
+    if has_search_index(conn):
+        rebuild_search_index(conn)
+        print("Search index rebuilt.")
+    else:
+        print("Full-text search is not available in this SQLite build.")
+    conn.close()
+
+def check_statistics(rebuild=False):
+    create_tables()
+    conn = get_db_connection()
+    stale = check_stats(conn)
+    if stale and rebuild:
+        rebuild_stats(conn)
+        print(f"Rebuilt stale statistics: {', '.join(stale)}")
+    elif stale:
+        print(f"Stale statistics: {', '.join(stale)}")
+    else:
+        print("Statistics are consistent.")
+    conn.close()
+
+def import_articles(path, format=None, restart=False, chunk_size=10000, workers=None):
+    from models.importer import import_file
+    create_tables()
+    conn = get_db_connection()
+
+    def report(result):
+        print(f"{result.skipped + result.processed} rows read, {result.imported} imported, "
+              f"{result.rejected} rejected, {result.rows_per_second:.0f} rows/s", flush=True)
+
+    result = import_file(conn, path, format, not restart, chunk_size, workers, report)
+    conn.close()
+    if result.skipped:
+        print(f"Resumed after {result.skipped} rows from the last checkpoint.")
+    unit = "Line" if result.format == "jsonl" else "Record"
+    for position, error in result.errors:
+        print(f"{unit} {position}: {error}")
+    print(f"Imported {result.imported} articles in {result.seconds:.2f}s ({result.rows_per_second:.0f} rows/s).")
+
+def rebalance_shards(catalog, shards):
+    from models.sharding import ShardRouter
+    with ShardRouter(catalog, shards) as router:
+        moves = router.rebalance()
+        for magazine_id, source, target in moves:
+            print(f"Moved magazine {magazine_id} from shard {source} to shard {target}.")
+        loads = [sum(counts.values()) for counts in router.shard_loads()]
+    print(f"Articles per shard: {', '.join(str(load) for load in loads)}")
+
+def snapshot(action, path, database=DATABASE_NAME, format=None):
+    from database.snapshot import export_snapshot, import_snapshot
+    if action == "export":
+        # The source is only read: exporting must not migrate it.
+        conn = get_db_connection(database, read_only=True)
+        version = schema_version(conn)
+        if version != SCHEMA_VERSION:
+            print(f"Warning: {database} is at schema version {version}, not {SCHEMA_VERSION}; "
+                  "exporting it as is. Importing the snapshot migrates it.")
+        format = export_snapshot(conn, path, format)
+        conn.close()
+        print(f"Exported {database} to {path} ({format}).")
+    else:
+        conn = get_db_connection(database)
+        counts = import_snapshot(conn, path)
+        conn.close()
+        print(", ".join(f"{count} {table}" for table, count in counts.items()) + f" imported into {database}.")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Magazine articles database")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("rebuild-search", help="rebuild the full-text search index")
+    stats = commands.add_parser("check-stats", help="check the materialized article statistics")
+    stats.add_argument("--rebuild", action="store_true", help="rebuild statistics that are out of date")
+    imports = commands.add_parser("import", help="import articles from a JSON lines or CSV file")
+    imports.add_argument("path", help="file with title, content, author, magazine and category fields")
+    imports.add_argument("--format", choices=["jsonl", "csv"], help="file format (default: from the extension)")
+    imports.add_argument("--restart", action="store_true", help="ignore the checkpoint of an earlier run")
+    imports.add_argument("--chunk-size", type=int, default=10000, help="rows written per transaction")
+    imports.add_argument("--workers", type=int, help="validation processes (0 validates in-process)")
+    rebalance = commands.add_parser("rebalance", help="even out articles across sharded databases")
+    rebalance.add_argument("catalog", help="database holding authors, magazines and shard placements")
+    rebalance.add_argument("shards", nargs="+", help="article databases, in shard order")
+    snapshots = commands.add_parser("snapshot", help="export or import a columnar snapshot of the dataset")
+    snapshots.add_argument("action", choices=["export", "import"])
+    snapshots.add_argument("path", help="snapshot file (or directory for Arrow snapshots)")
+    snapshots.add_argument("--database", default=DATABASE_NAME, help="database to export from or import into")
+    snapshots.add_argument("--format", choices=["arrow", "native"], help="export format (default: arrow when pyarrow is installed)")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.command == "rebuild-search":
+        rebuild_search()
+    elif args.command == "check-stats":
+        check_statistics(args.rebuild)
+    elif args.command == "import":
+        import_articles(args.path, args.format, args.restart, args.chunk_size, args.workers)
+    elif args.command == "rebalance":
+        rebalance_shards(args.catalog, args.shards)
+    elif args.command == "snapshot":
+        snapshot(args.action, args.path, args.database, args.format)
+    else:
+        main()
@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.dataset import make_records
+from database.connection import DEFAULT_PRAGMAS, get_db_connection
+from database.setup import create_tables
+from models.aio import AsyncDatabase
+from models.article import Article
+from models.magazine import Magazine
+
+
+def prepare(path, count, magazines):
+    conn = get_db_connection(path, DEFAULT_PRAGMAS)
+    create_tables(conn)
+    Article.bulk_create(conn, make_records(count, magazines=magazines))
+    ids = [magazine.id for magazine in Magazine.get_all_magazines(conn)]
+    conn.close()
+    return ids
+
+
+def run_sync(path, ids, requests):
+    conn = get_db_connection(path, DEFAULT_PRAGMAS)
+    start = time.perf_counter()
+    for i in range(requests):
+        Magazine.from_row((ids[i % len(ids)], None, None), conn).articles()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+async def run_async(path, ids, requests, readers):
+    async with AsyncDatabase(path, readers=readers) as db:
+        start = time.perf_counter()
+        await asyncio.gather(*(db.magazine_articles(ids[i % len(ids)]) for i in range(requests)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the asyncio facade under concurrent load")
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--magazines", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--readers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        ids = prepare(path, args.count, args.magazines)
+        elapsed = run_sync(path, ids, args.requests)
+        print(f"{'sync':>10}: {args.requests / elapsed:10.0f} requests/s")
+        for readers in args.readers:
+            elapsed = asyncio.run(run_async(path, ids, args.requests, readers))
+            print(f"{f'{readers} readers':>10}: {args.requests / elapsed:10.0f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
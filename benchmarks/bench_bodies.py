@@ -0,0 +1,73 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_search import make_records
+from database.setup import create_tables
+from models.article import Article
+from models.magazine import Magazine
+
+
+def table_bytes(conn, *tables):
+    sql = f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({', '.join('?' * len(tables))})"
+    return conn.execute(sql, tables).fetchone()[0] or 0
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>34}: {elapsed * 1000:9.1f} ms  peak {peak / 2**20:8.2f} MiB  {len(result)} rows")
+
+
+def inline_titles(conn, magazine_ids):
+    # The previous list path: hydrate full rows, content included, to read titles.
+    sql = "SELECT id, title, content, author_id, magazine_id FROM articles WHERE magazine_id = ? ORDER BY id"
+    return [row[1] for id in magazine_ids for row in conn.execute(sql, (id,)).fetchall()]
+
+
+def inline_articles(conn):
+    return conn.execute("SELECT id, title, content, author_id, magazine_id FROM articles ORDER BY id").fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inline article content with offloaded, compressed bodies")
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--words", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bodies.db")
+        conn = sqlite3.connect(path)
+        create_tables(conn)
+        Article.bulk_create(conn, make_records(args.count, args.words), 5000)
+        magazine_ids = [magazine.id for magazine in Magazine.get_all_magazines(conn)]
+
+        print(f"offloaded: articles {table_bytes(conn, 'articles') / 2**20:.1f} MiB, "
+              f"article_bodies {table_bytes(conn, 'article_bodies') / 2**20:.1f} MiB")
+        measure("offloaded article_titles", lambda: [
+            title for magazine in Magazine.find_by_ids(conn, magazine_ids).values() for title in magazine.article_titles()
+        ])
+        measure("offloaded get_all_articles", lambda: Article.get_all_articles(conn))
+        measure("offloaded get_all_articles+content", lambda: Article.get_all_articles(conn, include=("content",)))
+
+        # Writing the text back inline drops the bodies through the update trigger.
+        texts = [(article.content, article.id) for article in Article.get_all_articles(conn, include=("content",))]
+        with conn:
+            conn.executemany("UPDATE articles SET content = ? WHERE id = ?", texts)
+        conn.execute("VACUUM")
+        print(f"inline:    articles {table_bytes(conn, 'articles') / 2**20:.1f} MiB, "
+              f"article_bodies {table_bytes(conn, 'article_bodies') / 2**20:.1f} MiB")
+        measure("inline article_titles", lambda: inline_titles(conn, magazine_ids))
+        measure("inline get_all_articles", lambda: inline_articles(conn))
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
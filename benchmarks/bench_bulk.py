@@ -0,0 +1,57 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.dataset import make_records
+from database.setup import create_tables
+from models.article import Article
+from models.author import Author
+from models.magazine import Magazine
+
+
+def run_constructors(conn, records):
+    authors = {}
+    magazines = {}
+    for record in records:
+        author = authors.get(record["author"])
+        if author is None:
+            author = authors[record["author"]] = Author(name=record["author"], conn=conn)
+        magazine = magazines.get(record["magazine"])
+        if magazine is None:
+            magazine = magazines[record["magazine"]] = Magazine(name=record["magazine"], category=record["category"], conn=conn)
+        Article(title=record["title"], content=record["content"], author=author, magazine=magazine, conn=conn)
+
+
+def run_bulk(conn, records):
+    Article.bulk_create(conn, records)
+
+
+def timed(path, func, records):
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    create_tables(conn)
+    start = time.perf_counter()
+    func(conn, records)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-object inserts with Article.bulk_create")
+    parser.add_argument("--count", type=int, default=5000)
+    args = parser.parse_args()
+
+    records = list(make_records(args.count))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        for label, func in (("constructors", run_constructors), ("bulk_create", run_bulk)):
+            elapsed = timed(path, func, records)
+            print(f"{label:>12}: {elapsed:8.3f}s  {args.count / elapsed:12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
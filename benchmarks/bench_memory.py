@@ -0,0 +1,38 @@
+import argparse
+import sqlite3
+import time
+import tracemalloc
+
+from benchmarks.dataset import make_records
+from database.setup import create_tables
+from models.article import Article
+from models.article_table import ArticleTable
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>20}: {len(result):8d} rows  {elapsed:7.3f}s  retained {current / 2**20:8.2f} MiB  peak {peak / 2**20:8.2f} MiB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory held by article listings")
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(":memory:")
+    create_tables(conn)
+    Article.bulk_create(conn, make_records(args.count))
+
+    measure("get_all_articles", lambda: Article.get_all_articles(conn))
+    measure("ArticleTable.load", lambda: ArticleTable.load(conn))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
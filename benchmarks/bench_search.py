@@ -0,0 +1,51 @@
+import argparse
+import random
+import sqlite3
+import time
+
+from database.setup import create_tables
+from models.article import Article
+
+WORDS = ["tilapia", "omena", "dagaa", "sports", "technology", "election", "market", "weather", "music", "science",
+         "football", "budget", "harvest", "startup", "climate", "health", "travel", "culture", "fashion", "energy"]
+
+
+def make_records(count, words_per_article=60):
+    generator = random.Random(42)
+    return [
+        {
+            "title": f"Article {i} on {generator.choice(WORDS)}",
+            "content": " ".join(generator.choice(WORDS) + str(generator.randrange(1000)) for _ in range(words_per_article)),
+            "author": f"Author {i % 200}",
+            "magazine": f"Magazine {i % 20}",
+            "category": "General",
+        }
+        for i in range(count)
+    ]
+
+
+def timed(label, func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:>8}: {elapsed * 1000:9.3f} ms/query  {len(results)} results")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FTS5 search with the LIKE scan fallback")
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--query", default="climate999")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(":memory:")
+    create_tables(conn)
+    Article.bulk_create(conn, make_records(args.count))
+    timed("fts5", lambda: Article.search(conn, args.query, limit=20), args.repeat)
+    timed("like", lambda: Article.search_like(conn, args.query, limit=20), args.repeat)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
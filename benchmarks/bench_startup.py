@@ -0,0 +1,76 @@
+import argparse
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from database.setup import create_base_tables, create_tables, migrate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def import_times(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match:
+            times.append((int(match[2]), int(match[1]), len(match[3]) // 2, match[4]))
+    return times
+
+
+def wall_clock(args, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def schema_check(repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        conn = sqlite3.connect(os.path.join(directory, "startup.db"))
+        create_tables(conn)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            create_tables(conn)
+        current = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        for _ in range(repeat):
+            create_base_tables(conn)
+            migrate(conn)
+        full = (time.perf_counter() - start) / repeat
+        conn.close()
+    return current, full
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app.py startup: module import time and schema checks")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    times = import_times(args.module)
+    own = [entry for entry in times if entry[3].split(".")[0] in ("app", "models", "database")]
+    total = next(cumulative for cumulative, _, _, name in times if name == args.module)
+    print(f"import {args.module}: {total / 1000:.1f} ms cumulative, {len(times)} modules, "
+          f"{sum(entry[1] for entry in own) / 1000:.1f} ms in project modules")
+    for cumulative, own_time, depth, name in sorted(times, reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.2f} ms  {own_time / 1000:8.2f} ms self  {'  ' * depth}{name}")
+    print(f"python app.py --help: {wall_clock(['app.py', '--help'], args.repeat) * 1000:.1f} ms (best of {args.repeat})")
+    print(f"python -c pass:       {wall_clock(['-c', 'pass'], args.repeat) * 1000:.1f} ms (interpreter baseline)")
+    current, full = schema_check(args.repeat * 10)
+    print(f"create_tables on a current schema: {current * 1e6:.0f} us (DDL pass: {full * 1e6:.0f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import os
+import random
+import sqlite3
+
+from database.batch import DEFAULT_BATCH_SIZE
+from database.connection import Connection
+from database.setup import create_tables
+from models.article import Article
+
+CATEGORIES = ["Technology", "Sports", "Politics", "Business", "Culture", "Science", "Health", "Travel"]
+
+
+def make_records(count, authors=100, magazines=20, seed=None):
+    generator = random.Random(seed)
+    for i in range(count):
+        author = i % authors if seed is None else generator.randrange(authors)
+        magazine = i % magazines if seed is None else generator.randrange(magazines)
+        yield {
+            "title": f"Article number {i}",
+            "content": f"Content for article {i}",
+            "author": f"Author {author}",
+            "magazine": f"Magazine {magazine}",
+            "category": CATEGORIES[magazine % len(CATEGORIES)],
+        }
+
+
+def open_database(storage, directory=None, name="bench.db"):
+    if storage == "memory":
+        return sqlite3.connect(":memory:", factory=Connection)
+    path = os.path.join(directory, name)
+    if os.path.exists(path):
+        os.remove(path)
+    return sqlite3.connect(path, factory=Connection)
+
+
+def populate(conn, articles, authors=None, magazines=None, seed=42, chunk_size=DEFAULT_BATCH_SIZE * 10):
+    authors = authors or max(10, articles // 100)
+    magazines = magazines or max(5, articles // 2000)
+    create_tables(conn)
+    Article.bulk_create(conn, make_records(articles, authors, magazines, seed), chunk_size)
+    return conn
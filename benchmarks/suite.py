@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app import record_article
+from benchmarks.dataset import make_records, open_database, populate
+from models.article import Article
+from models.author import Author
+from models.instrumentation import capture
+from models.magazine import Magazine
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MEMORY_TOLERANCE = 0.10
+
+
+class Context:
+    def __init__(self, conn):
+        self.conn = conn
+        self.author = Author.get_authors_page(conn, limit=1)[0]
+        self.magazine = Magazine.get_magazines_page(conn, limit=1)[0]
+        self.writes = 0
+
+    def next_records(self, count):
+        self.writes += count
+        return make_records(count, seed=self.writes)
+
+
+def create_with_constructors(ctx, count=100):
+    for record in ctx.next_records(count):
+        author = Author(name=record["author"], conn=ctx.conn)
+        magazine = Magazine(name=record["magazine"], category=record["category"], conn=ctx.conn)
+        Article(title=record["title"], content=record["content"], author=author, magazine=magazine, conn=ctx.conn)
+
+
+def create_with_bulk_create(ctx, count=1000):
+    Article.bulk_create(ctx.conn, ctx.next_records(count))
+
+
+def app_flow(ctx):
+    record_article(ctx.conn, "Benchmark Author", "Benchmarks", "Technology", "Benchmark article", "Content")
+
+
+READ_CASES = {
+    "get_all_articles": lambda ctx: Article.get_all_articles(ctx.conn),
+    "get_all_authors": lambda ctx: Author.get_all_authors(ctx.conn),
+    "get_all_magazines": lambda ctx: Magazine.get_all_magazines(ctx.conn),
+    "author.articles": lambda ctx: ctx.author.articles(),
+    "author.magazines": lambda ctx: ctx.author.magazines(),
+    "magazine.articles": lambda ctx: ctx.magazine.articles(),
+    "magazine.contributors": lambda ctx: ctx.magazine.contributors(),
+    "magazine.contributing_authors": lambda ctx: ctx.magazine.contributing_authors(),
+}
+
+WRITE_CASES = {
+    "create.constructors_x100": create_with_constructors,
+    "create.bulk_create_x1000": create_with_bulk_create,
+    "app_flow": app_flow,
+}
+
+CASES = {**READ_CASES, **WRITE_CASES}
+
+
+def run_case(ctx, func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(ctx)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    with capture(ctx.conn) as profile:
+        func(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "queries": profile.query_count, "peak_bytes": peak}
+
+
+def run_suite(sizes, storages, cases, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for storage in storages:
+            for size in sizes:
+                conn = open_database(storage, directory)
+                start = time.perf_counter()
+                populate(conn, size)
+                print(f"# {storage} {size} articles populated in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+                ctx = Context(conn)
+                for name in cases:
+                    results[f"{storage}/{size}/{name}"] = run_case(ctx, CASES[name], repeat)
+                conn.close()
+    return results
+
+
+def compare(results, baseline, tolerance, memory_tolerance=DEFAULT_MEMORY_TOLERANCE):
+    # Timings are noisy and get a tolerance; query counts are deterministic,
+    # so any increase is a regression.
+    regressions = []
+    missing = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            missing.append(key)
+            continue
+        if result["seconds"] > previous["seconds"] * (1 + tolerance):
+            regressions.append((key, "seconds", previous["seconds"], result["seconds"]))
+        if result["queries"] > previous["queries"]:
+            regressions.append((key, "queries", previous["queries"], result["queries"]))
+        if result["peak_bytes"] > previous["peak_bytes"] * (1 + memory_tolerance):
+            regressions.append((key, "peak_bytes", previous["peak_bytes"], result["peak_bytes"]))
+    return regressions, missing
+
+
+def format_metric(metric, value):
+    if metric == "seconds":
+        return f"{value * 1000:.3f} ms"
+    if metric == "peak_bytes":
+        return f"{value / 1024:.1f} KiB"
+    return str(value)
+
+
+def print_results(results, baseline):
+    print(f"{'case':<52} {'ms':>10} {'baseline':>10} {'queries':>8} {'peak KiB':>10}")
+    for key, result in results.items():
+        previous = baseline.get(key)
+        reference = f"{previous['seconds'] * 1000:10.3f}" if previous else f"{'-':>10}"
+        print(f"{key:<52} {result['seconds'] * 1000:10.3f} {reference} {result['queries']:>8} {result['peak_bytes'] / 1024:10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the models and database layer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000], help="article counts, e.g. 10000 1000000 5000000")
+    parser.add_argument("--storage", nargs="+", choices=["memory", "disk"], default=["memory"])
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE)
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline JSON file")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.storage, args.cases, args.repeat)
+    baseline = {}
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    regressions, missing = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    for key in missing:
+        print(f"NO BASELINE {key}", file=sys.stderr)
+    for key, metric, previous, current in regressions:
+        print(f"REGRESSION {key} {metric}: {format_metric(metric, previous)} -> {format_metric(metric, current)}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
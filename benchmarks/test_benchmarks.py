@@ -0,0 +1,18 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.dataset import open_database, populate  # noqa: E402
+from benchmarks.suite import CASES, Context  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def context():
+    conn = populate(open_database("memory"), 10000)
+    yield Context(conn)
+    conn.close()
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_case(benchmark, context, name):
+    benchmark(CASES[name], context)
@@ -0,0 +1,50 @@
+from itertools import islice
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_PAGE_SIZE = 50
+SQLITE_MAX_VARIABLES = 900
+
+
+def iter_batches(cursor, batch_size=DEFAULT_BATCH_SIZE):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows
+
+
+def iter_query(conn, sql, params=(), batch_size=DEFAULT_BATCH_SIZE):
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    try:
+        yield from iter_batches(cursor, batch_size)
+    finally:
+        cursor.close()
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            break
+        yield chunk
+
+
+def placeholders(count):
+    return ", ".join("?" * count)
+
+
+def padded(values, limit=SQLITE_MAX_VARIABLES):
+    # Rounding IN-lists up to a power of two by repeating the last value
+    # keeps the number of distinct statements small enough to stay cached.
+    values = list(values)
+    size = 1
+    while size < len(values):
+        size *= 2
+    return values + values[-1:] * (min(size, limit) - len(values))
+
+
+def inserted_ids(conn, count):
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return range(last_id - count + 1, last_id + 1)
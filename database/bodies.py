@@ -0,0 +1,168 @@
+import sqlite3
+import zlib
+
+from .batch import DEFAULT_BATCH_SIZE, SQLITE_MAX_VARIABLES, chunked, inserted_ids, iter_query, padded, placeholders
+from .connection import has_table
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODEC = 'zstd' if zstandard is not None else 'zlib'
+MIN_COMPRESSED_SIZE = 64
+INLINE_SIZE = 64
+
+ARTICLE_BODIES_BY_IDS = """SELECT articles.id, articles.content, article_bodies.codec, article_bodies.body
+                           FROM articles LEFT JOIN article_bodies ON article_bodies.article_id = articles.id
+                           WHERE articles.id IN ({placeholders})"""
+
+
+def encode_body(text):
+    data = text.encode('utf-8')
+    if len(data) >= MIN_COMPRESSED_SIZE:
+        if CODEC == 'zstd':
+            compressed = zstandard.ZstdCompressor().compress(data)
+        else:
+            compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data):
+            return CODEC, compressed
+    return 'raw', data
+
+
+def decode_body(codec, body):
+    if codec == 'zlib':
+        body = zlib.decompress(body)
+    elif codec == 'zstd':
+        body = zstandard.ZstdDecompressor().decompress(body)
+    elif codec != 'raw':
+        raise ValueError(f'Unknown article body codec: {codec}')
+    return bytes(body).decode('utf-8')
+
+
+def article_text(content, codec, body):
+    # A row in article_bodies is what marks a body as offloaded; any write to
+    # articles.content drops it, so an empty inline value is just empty.
+    if body is None:
+        return content
+    return decode_body(codec, body)
+
+
+def create_body_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS article_bodies (
+            article_id INTEGER PRIMARY KEY,
+            codec TEXT NOT NULL,
+            body BLOB NOT NULL
+        )
+    ''')
+    create_body_triggers(conn)
+
+
+def create_body_triggers(conn):
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_bodies_delete AFTER DELETE ON articles BEGIN
+            DELETE FROM article_bodies WHERE article_id = old.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_bodies_update AFTER UPDATE OF content ON articles BEGIN
+            DELETE FROM article_bodies WHERE article_id = new.id;
+        END
+    ''')
+
+
+def recreate_body_triggers(conn):
+    if has_table(conn, 'article_bodies'):
+        conn.execute('DROP TRIGGER IF EXISTS articles_bodies_update')
+        create_body_triggers(conn)
+
+
+def offload_bodies(conn, batch_size=DEFAULT_BATCH_SIZE):
+    sql = "SELECT id, content FROM articles WHERE length(content) >= ? AND id > ? ORDER BY id LIMIT ?"
+    indexed = has_table(conn, 'articles_fts')
+    last_id = 0
+    while True:
+        rows = conn.execute(sql, (INLINE_SIZE, last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        # Clearing the inline content first fires the triggers that drop a
+        # stale body and blank the search entry, which are then rewritten.
+        conn.executemany("UPDATE articles SET content = '' WHERE id = ?", [(row[0],) for row in rows])
+        conn.executemany(
+            'INSERT INTO article_bodies (article_id, codec, body) VALUES (?, ?, ?)',
+            [(row[0], *encode_body(row[1])) for row in rows],
+        )
+        if indexed:
+            conn.executemany('UPDATE articles_fts SET content = ? WHERE rowid = ?', [(row[1], row[0]) for row in rows])
+
+
+def _offloaded(content):
+    return content is not None and len(content) >= INLINE_SIZE
+
+
+def _inline(content):
+    return '' if _offloaded(content) else content
+
+
+def store_articles(conn, rows):
+    # Rows are (title, content, author_id, magazine_id), optionally preceded
+    # by an explicit id. Short content stays inline and None is rejected by
+    # the NOT NULL constraint; longer bodies go to article_bodies and their
+    # search entry is filled in here, since the insert trigger only saw the
+    # empty inline content.
+    rows = list(rows)
+    if not rows:
+        return []
+    if len(rows[0]) == 5:
+        conn.executemany(
+            'INSERT INTO articles (id, title, content, author_id, magazine_id) VALUES (?, ?, ?, ?, ?)',
+            [(id, title, _inline(content), author_id, magazine_id) for id, title, content, author_id, magazine_id in rows],
+        )
+        ids = [row[0] for row in rows]
+        rows = [row[1:] for row in rows]
+    else:
+        conn.executemany(
+            'INSERT INTO articles (title, content, author_id, magazine_id) VALUES (?, ?, ?, ?)',
+            [(title, _inline(content), author_id, magazine_id) for title, content, author_id, magazine_id in rows],
+        )
+        ids = list(inserted_ids(conn, len(rows)))
+    offloaded = [(row[1], id) for id, row in zip(ids, rows) if _offloaded(row[1])]
+    if offloaded:
+        conn.executemany(
+            'INSERT INTO article_bodies (article_id, codec, body) VALUES (?, ?, ?)',
+            [(id, *encode_body(content)) for content, id in offloaded],
+        )
+        # Writes are hot, so a missing search index is detected by the
+        # update itself instead of a sqlite_master probe per call.
+        try:
+            conn.executemany('UPDATE articles_fts SET content = ? WHERE rowid = ?', offloaded)
+        except sqlite3.OperationalError as error:
+            if not str(error).startswith('no such table'):
+                raise
+    return ids
+
+
+def load_bodies(conn, ids):
+    bodies = {}
+    for chunk in chunked(ids, SQLITE_MAX_VARIABLES):
+        chunk = padded(chunk)
+        sql = ARTICLE_BODIES_BY_IDS.format(placeholders=placeholders(len(chunk)))
+        for row in conn.execute(sql, chunk):
+            bodies[row[0]] = article_text(row[1], row[2], row[3])
+    return bodies
+
+
+def iter_article_texts(conn, batch_size=DEFAULT_BATCH_SIZE):
+    if not has_table(conn, 'article_bodies'):
+        for rows in iter_query(conn, 'SELECT id, title, content FROM articles ORDER BY id', (), batch_size):
+            yield [tuple(row) for row in rows]
+        return
+    sql = '''
+        SELECT articles.id, articles.title, articles.content, article_bodies.codec, article_bodies.body
+        FROM articles LEFT JOIN article_bodies ON article_bodies.article_id = articles.id
+        ORDER BY articles.id
+    '''
+    for rows in iter_query(conn, sql, (), batch_size):
+        yield [(row[0], row[1], article_text(row[2], row[3], row[4])) for row in rows]
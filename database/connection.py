@@ -1,8 +1,65 @@
 import sqlite3
+from pathlib import Path
 
 DATABASE_NAME = './database/magazine.db'
 
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE_NAME)
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+# Every named statement in models.queries plus one shape per padded IN-list
+# size, with room to spare for ad hoc queries.
+STATEMENT_CACHE_SIZE = 256
+
+class Cursor(sqlite3.Cursor):
+    # The hook sees each execute() once, where a trace callback also fires
+    # for every trigger sub-program and for every row of an executemany().
+    def execute(self, sql, parameters=()):
+        hook = self.connection.statement_hook
+        if hook is not None:
+            hook(sql, False)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        hook = self.connection.statement_hook
+        if hook is not None:
+            hook(sql, True)
+        return super().executemany(sql, seq_of_parameters)
+
+class Connection(sqlite3.Connection):
+    model_session = None
+    statement_hook = None
+
+    def cursor(self, factory=Cursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def apply_pragmas(conn, pragmas):
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}').fetchall()
+
+def has_table(conn, name):
+    sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return conn.execute(sql, (name,)).fetchone() is not None
+
+def get_db_connection(database=DATABASE_NAME, pragmas=None, read_only=False, **kwargs):
+    if read_only:
+        database = Path(database).resolve().as_uri() + '?mode=ro'
+        kwargs['uri'] = True
+    kwargs.setdefault('factory', Connection)
+    kwargs.setdefault('cached_statements', STATEMENT_CACHE_SIZE)
+    conn = sqlite3.connect(database, **kwargs)
     conn.row_factory = sqlite3.Row
+    if pragmas:
+        apply_pragmas(conn, pragmas)
     return conn
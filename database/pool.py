@@ -0,0 +1,49 @@
+import threading
+from contextlib import contextmanager
+
+from .connection import DATABASE_NAME, DEFAULT_PRAGMAS, get_db_connection
+
+
+class ConnectionPool:
+    def __init__(self, database=DATABASE_NAME, pragmas=None, attach=None):
+        self.database = database
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.attach = dict(attach or {})
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = get_db_connection(self.database, self.pragmas, check_same_thread=False)
+            for alias, database in self.attach.items():
+                conn.execute(f'ATTACH DATABASE ? AS {alias}', (database,))
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self.get()
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
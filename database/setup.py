@@ -1,7 +1,159 @@
-from .connection import get_db_connection
+import sqlite3
 
-def create_tables():
-    conn = get_db_connection()
+from .bodies import create_body_table, iter_article_texts, offload_bodies, recreate_body_triggers
+from .connection import get_db_connection, has_table
+from .stats import create_stats_tables
+
+
+def fts5_available(conn):
+    try:
+        conn.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(value)')
+    except sqlite3.OperationalError:
+        return False
+    conn.execute('DROP TABLE temp.fts5_probe')
+    return True
+
+
+def has_search_index(conn):
+    return has_table(conn, 'articles_fts')
+
+
+def index_articles(conn):
+    for rows in iter_article_texts(conn):
+        conn.executemany('INSERT INTO articles_fts (rowid, title, content) VALUES (?, ?, ?)', rows)
+
+
+def rebuild_search_index(conn):
+    conn.execute('DELETE FROM articles_fts')
+    index_articles(conn)
+    conn.commit()
+
+
+def create_search_triggers(conn):
+    # Rows with an offloaded body are indexed with empty content here and
+    # get their body filled in by store_articles.
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+            DELETE FROM articles_fts WHERE rowid = old.id;
+        END
+    ''')
+    # Title changes are indexed even when the body lives in article_bodies.
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_fts_update_title AFTER UPDATE OF title ON articles BEGIN
+            UPDATE articles_fts SET title = new.title WHERE rowid = new.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_fts_update_content AFTER UPDATE OF content ON articles BEGIN
+            UPDATE articles_fts SET content = new.content WHERE rowid = new.id;
+        END
+    ''')
+
+
+def create_search_index(conn):
+    if not fts5_available(conn):
+        return
+    conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(title, content)')
+    create_search_triggers(conn)
+    index_articles(conn)
+
+
+def recreate_search_triggers(conn):
+    if has_search_index(conn):
+        for name in ('articles_fts_insert', 'articles_fts_update', 'articles_fts_update_title', 'articles_fts_update_content'):
+            conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        create_search_triggers(conn)
+
+
+def offload_article_bodies(conn):
+    create_body_table(conn)
+    recreate_search_triggers(conn)
+    offload_bodies(conn)
+
+
+MIGRATIONS = [
+    [
+        '''
+        UPDATE articles
+        SET author_id = (
+            SELECT MIN(keep.id) FROM authors AS keep
+            JOIN authors AS duplicate ON duplicate.name = keep.name
+            WHERE duplicate.id = articles.author_id
+        )
+        WHERE author_id IN (SELECT id FROM authors WHERE id NOT IN (SELECT MIN(id) FROM authors GROUP BY name))
+        ''',
+        'DELETE FROM authors WHERE id NOT IN (SELECT MIN(id) FROM authors GROUP BY name)',
+        '''
+        UPDATE articles
+        SET magazine_id = (
+            SELECT MIN(keep.id) FROM magazines AS keep
+            JOIN magazines AS duplicate ON duplicate.name = keep.name
+            WHERE duplicate.id = articles.magazine_id
+        )
+        WHERE magazine_id IN (SELECT id FROM magazines WHERE id NOT IN (SELECT MIN(id) FROM magazines GROUP BY name))
+        ''',
+        'DELETE FROM magazines WHERE id NOT IN (SELECT MIN(id) FROM magazines GROUP BY name)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_authors_name ON authors (name)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_magazines_name ON magazines (name)',
+        'CREATE INDEX IF NOT EXISTS idx_articles_author_magazine ON articles (author_id, magazine_id)',
+        'CREATE INDEX IF NOT EXISTS idx_articles_magazine_author ON articles (magazine_id, author_id)',
+    ],
+    [
+        create_search_index,
+    ],
+    [
+        'CREATE INDEX IF NOT EXISTS idx_articles_author ON articles (author_id)',
+        'CREATE INDEX IF NOT EXISTS idx_articles_magazine ON articles (magazine_id)',
+    ],
+    [
+        create_stats_tables,
+    ],
+    [
+        'CREATE TABLE IF NOT EXISTS import_checkpoints (source TEXT PRIMARY KEY, rows INTEGER NOT NULL)',
+    ],
+    [
+        offload_article_bodies,
+    ],
+    [
+        recreate_search_triggers,
+    ],
+    [
+        recreate_body_triggers,
+        recreate_search_triggers,
+    ],
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    version = schema_version(conn)
+    for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute('BEGIN')
+        try:
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {number}')
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+    return schema_version(conn)
+
+
+def create_base_tables(conn):
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -28,7 +180,18 @@ def create_tables():
             FOREIGN KEY (magazine_id) REFERENCES magazines (id)
         )
     ''')
-
     conn.commit()
-    conn.close()
+
+
+def create_tables(conn=None):
+    owns_connection = conn is None
+    if owns_connection:
+        conn = get_db_connection()
+    # A current user_version means every table and migration is in place,
+    # so startup costs a single PRAGMA instead of the DDL.
+    if schema_version(conn) != SCHEMA_VERSION:
+        create_base_tables(conn)
+        migrate(conn)
+    if owns_connection:
+        conn.close()
 
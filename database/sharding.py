@@ -0,0 +1,58 @@
+from .bodies import create_body_table, recreate_body_triggers
+from .setup import create_search_index, create_tables, has_search_index, recreate_search_triggers
+from .stats import create_stats_tables
+
+
+def create_catalog_tables(conn):
+    create_tables(conn)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS shard_placements (
+            magazine_id INTEGER PRIMARY KEY,
+            shard INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_shard_placements_shard ON shard_placements (shard, magazine_id)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS shard_sequences (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.commit()
+
+
+def create_shard_tables(conn):
+    # Shards only hold articles; authors and magazines are read from the
+    # attached catalog, so the foreign keys cannot be declared here.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS articles (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            author_id INTEGER,
+            magazine_id INTEGER
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_author ON articles (author_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_magazine ON articles (magazine_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_author_magazine ON articles (author_id, magazine_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_magazine_author ON articles (magazine_id, author_id)')
+    create_body_table(conn)
+    recreate_body_triggers(conn)
+    if has_search_index(conn):
+        recreate_search_triggers(conn)
+    else:
+        create_search_index(conn)
+    create_stats_tables(conn)
+    conn.commit()
+
+
+def allocate_ids(conn, name, count):
+    sql = '''
+        INSERT INTO shard_sequences (name, value) VALUES (?, ?)
+        ON CONFLICT (name) DO UPDATE SET value = value + excluded.value
+        RETURNING value
+    '''
+    with conn:
+        last_id = conn.execute(sql, (name, count)).fetchone()[0]
+    return range(last_id - count + 1, last_id + 1)
@@ -0,0 +1,317 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+
+from .batch import DEFAULT_BATCH_SIZE, chunked, iter_query
+from .bodies import article_text, store_articles
+from .connection import has_table
+from .setup import create_base_tables, migrate, schema_version
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+MAGIC = b'MAGSNAP1'
+FOOTER = struct.Struct('<QQ8s')
+NULL_INT = -2 ** 63
+ALIGNMENT = 8
+
+TABLES = {
+    'authors': (('id', 'int64'), ('name', 'utf8')),
+    'magazines': (('id', 'int64'), ('name', 'utf8'), ('category', 'utf8')),
+    'articles': (('id', 'int64'), ('title', 'utf8'), ('content', 'utf8'), ('author_id', 'int64'), ('magazine_id', 'int64')),
+}
+
+
+def iter_table(conn, table, columns, batch_size=DEFAULT_BATCH_SIZE):
+    # Offloaded article bodies are decoded so snapshots always carry plain text.
+    if table == 'articles' and 'content' in columns and has_table(conn, 'article_bodies'):
+        select = ', '.join(f'articles.{column}' for column in columns)
+        sql = f'''
+            SELECT {select}, article_bodies.codec, article_bodies.body
+            FROM articles LEFT JOIN article_bodies ON article_bodies.article_id = articles.id
+            ORDER BY articles.id
+        '''
+        index = columns.index('content')
+        for rows in iter_query(conn, sql, (), batch_size):
+            yield [
+                row[:index] + (article_text(row[index], row[-2], row[-1]),) + row[index + 1:-2]
+                for row in map(tuple, rows)
+            ]
+    else:
+        sql = f'SELECT {", ".join(columns)} FROM {table} ORDER BY id'
+        for rows in iter_query(conn, sql, (), batch_size):
+            yield [tuple(row) for row in rows]
+
+
+class _Writer:
+    def __init__(self, output):
+        self.output = output
+        self.position = 0
+
+    def write(self, data):
+        self.output.write(data)
+        self.position += len(data)
+
+    def align(self):
+        padding = -self.position % ALIGNMENT
+        if padding:
+            self.write(b'\0' * padding)
+
+    def write_array(self, values):
+        self.align()
+        start = self.position
+        self.write(values.tobytes())
+        return {'offset': start, 'length': self.position - start}
+
+    def write_column(self, kind, batches):
+        if kind == 'int64':
+            self.align()
+            start = self.position
+            for values in batches:
+                self.write(array('q', (NULL_INT if value is None else value for value in values)).tobytes())
+            return {'type': kind, 'offset': start, 'length': self.position - start}, (self.position - start) // 8
+        offsets = array('q', [0])
+        start = self.position
+        for values in batches:
+            for value in values:
+                data = value.encode('utf-8')
+                self.write(data)
+                offsets.append(offsets[-1] + len(data))
+        data = {'offset': start, 'length': self.position - start}
+        return {'type': kind, 'data': data, 'offsets': self.write_array(offsets)}, len(offsets) - 1
+
+
+@contextmanager
+def read_transaction(conn):
+    # Every column is read in its own pass, so they must all see the same
+    # database state even while other connections keep writing.
+    if conn.in_transaction:
+        yield
+        return
+    conn.execute('BEGIN')
+    try:
+        yield
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def export_native(conn, path, batch_size=DEFAULT_BATCH_SIZE):
+    with read_transaction(conn), open(path, 'wb') as output:
+        manifest = {'version': 1, 'byteorder': sys.byteorder, 'schema_version': schema_version(conn), 'tables': {}}
+        writer = _Writer(output)
+        writer.write(MAGIC)
+        for table, columns in TABLES.items():
+            described = {}
+            # One pass per column keeps memory flat: only the text offsets of
+            # the current column are held until it is written.
+            for column, kind in columns:
+                batches = ([row[0] for row in rows] for rows in iter_table(conn, table, [column], batch_size))
+                described[column], rows = writer.write_column(kind, batches)
+            manifest['tables'][table] = {'rows': rows, 'columns': described}
+        data = json.dumps(manifest).encode('utf-8')
+        writer.align()
+        start = writer.position
+        writer.write(data)
+        writer.write(FOOTER.pack(start, len(data), MAGIC))
+    return manifest
+
+
+def export_arrow(conn, path, batch_size=DEFAULT_BATCH_SIZE):
+    types = {'int64': pyarrow.int64(), 'utf8': pyarrow.large_string()}
+    os.makedirs(path, exist_ok=True)
+    with read_transaction(conn):
+        for table, columns in TABLES.items():
+            schema = pyarrow.schema([(column, types[kind]) for column, kind in columns])
+            names = [column for column, _ in columns]
+            with pyarrow.OSFile(os.path.join(path, f'{table}.arrow'), 'wb') as sink:
+                with pyarrow.ipc.new_file(sink, schema) as writer:
+                    for rows in iter_table(conn, table, names, batch_size):
+                        writer.write_batch(pyarrow.RecordBatch.from_arrays(
+                            [pyarrow.array(values, types[kind]) for values, (_, kind) in zip(zip(*rows), columns)],
+                            schema=schema,
+                        ))
+
+
+def export_snapshot(conn, path, format=None, batch_size=DEFAULT_BATCH_SIZE):
+    format = format or ('arrow' if pyarrow is not None else 'native')
+    if format == 'arrow':
+        if pyarrow is None:
+            raise RuntimeError('Arrow snapshots need the pyarrow package')
+        export_arrow(conn, path, batch_size)
+    elif format == 'native':
+        export_native(conn, path, batch_size)
+    else:
+        raise ValueError(f'Unknown snapshot format: {format}')
+    return format
+
+
+class TextColumn:
+    __slots__ = ('offsets', 'data')
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return str(self.data[self.offsets[index]:self.offsets[index + 1]], 'utf-8')
+
+    def __iter__(self):
+        offsets, data = self.offsets, self.data
+        for index in range(len(offsets) - 1):
+            yield str(data[offsets[index]:offsets[index + 1]], 'utf-8')
+
+
+class Snapshot:
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a snapshot')
+        start, length, magic = FOOTER.unpack_from(self._map, len(self._map) - FOOTER.size)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is truncated')
+        self.manifest = json.loads(self._map[start:start + length])
+        self._swap = self.manifest['byteorder'] != sys.byteorder
+        self._columns = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._columns = {}
+        self._map.close()
+        self._file.close()
+
+    def _int64(self, block):
+        view = memoryview(self._map)[block['offset']:block['offset'] + block['length']]
+        self._views.append(view)
+        if self._swap:
+            values = array('q')
+            values.frombytes(view)
+            values.byteswap()
+            return values
+        values = view.cast('q')
+        self._views.append(values)
+        return values
+
+    def row_count(self, table):
+        return self.manifest['tables'][table]['rows']
+
+    def column(self, table, name):
+        key = (table, name)
+        if key not in self._columns:
+            block = self.manifest['tables'][table]['columns'][name]
+            if block['type'] == 'int64':
+                self._columns[key] = self._int64(block)
+            else:
+                data = memoryview(self._map)[block['data']['offset']:block['data']['offset'] + block['data']['length']]
+                self._views.append(data)
+                self._columns[key] = TextColumn(self._int64(block['offsets']), data)
+        return self._columns[key]
+
+    def rows(self, table):
+        columns = []
+        for name, kind in TABLES[table]:
+            column = self.column(table, name)
+            if kind == 'int64':
+                column = (None if value == NULL_INT else value for value in column)
+            columns.append(column)
+        return zip(*columns)
+
+    def count_by(self, table, name):
+        counts = Counter(self.column(table, name))
+        counts.pop(NULL_INT, None)
+        return counts
+
+    def author_article_counts(self, magazine_id):
+        authors, magazines = self.column('articles', 'author_id'), self.column('articles', 'magazine_id')
+        return Counter(author for author, magazine in zip(authors, magazines) if magazine == magazine_id)
+
+
+class ArrowSnapshot:
+    def __init__(self, path):
+        if pyarrow is None:
+            raise RuntimeError('Arrow snapshots need the pyarrow package')
+        self.tables = {
+            table: pyarrow.ipc.open_file(pyarrow.memory_map(os.path.join(path, f'{table}.arrow'))).read_all()
+            for table in TABLES
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.tables = {}
+
+    def row_count(self, table):
+        return self.tables[table].num_rows
+
+    def column(self, table, name):
+        return self.tables[table].column(name).to_pylist()
+
+    def rows(self, table):
+        for batch in self.tables[table].to_batches():
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+
+    def count_by(self, table, name):
+        counts = Counter(self.column(table, name))
+        counts.pop(None, None)
+        return counts
+
+
+def open_snapshot(path):
+    if os.path.isdir(path):
+        return ArrowSnapshot(path)
+    return Snapshot(path)
+
+
+def import_snapshot(conn, path, batch_size=DEFAULT_BATCH_SIZE):
+    fresh = schema_version(conn) == 0
+    create_base_tables(conn)
+    for table in TABLES:
+        if conn.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone():
+            raise ValueError(f'Snapshots can only be imported into an empty database ({table} has rows)')
+    counts = {}
+    with open_snapshot(path) as snapshot:
+        with conn:
+            for table, columns in TABLES.items():
+                names = [column for column, _ in columns]
+                sql = f'INSERT INTO {table} ({", ".join(names)}) VALUES ({", ".join("?" * len(names))})'
+                for rows in chunked(snapshot.rows(table), batch_size):
+                    if table == 'articles' and not fresh:
+                        store_articles(conn, rows)
+                    else:
+                        conn.executemany(sql, rows)
+                counts[table] = snapshot.row_count(table)
+    # A fresh database gets its indexes, search index, statistics and body
+    # storage built once, after the bulk load.
+    if fresh:
+        migrate(conn)
+    return counts
@@ -0,0 +1,132 @@
+STATS_TABLES = ('author_magazine_stats', 'magazine_stats', 'author_stats')
+
+COMPUTED_STATS = {
+    'author_magazine_stats': '''
+        SELECT author_id, magazine_id, COUNT(*) FROM articles
+        WHERE author_id IS NOT NULL AND magazine_id IS NOT NULL
+        GROUP BY author_id, magazine_id
+    ''',
+    'magazine_stats': '''
+        SELECT magazine_id, COUNT(*), COUNT(DISTINCT author_id) FROM articles
+        WHERE magazine_id IS NOT NULL
+        GROUP BY magazine_id
+    ''',
+    'author_stats': '''
+        SELECT author_id, COUNT(*), COUNT(DISTINCT magazine_id) FROM articles
+        WHERE author_id IS NOT NULL
+        GROUP BY author_id
+    ''',
+}
+
+MATERIALIZED_STATS = {
+    'author_magazine_stats': 'SELECT author_id, magazine_id, article_count FROM author_magazine_stats',
+    'magazine_stats': 'SELECT magazine_id, article_count, contributor_count FROM magazine_stats WHERE article_count > 0',
+    'author_stats': 'SELECT author_id, article_count, magazine_count FROM author_stats WHERE article_count > 0',
+}
+
+
+def _added(row):
+    pair = f'author_id = {row}.author_id AND magazine_id = {row}.magazine_id'
+    return f'''
+        INSERT INTO author_magazine_stats (author_id, magazine_id, article_count)
+        SELECT {row}.author_id, {row}.magazine_id, 1
+        WHERE {row}.author_id IS NOT NULL AND {row}.magazine_id IS NOT NULL
+        ON CONFLICT (author_id, magazine_id) DO UPDATE SET article_count = article_count + 1;
+        INSERT INTO magazine_stats (magazine_id, article_count, contributor_count)
+        SELECT {row}.magazine_id, 1, 0 WHERE {row}.magazine_id IS NOT NULL
+        ON CONFLICT (magazine_id) DO UPDATE SET article_count = article_count + 1;
+        INSERT INTO author_stats (author_id, article_count, magazine_count)
+        SELECT {row}.author_id, 1, 0 WHERE {row}.author_id IS NOT NULL
+        ON CONFLICT (author_id) DO UPDATE SET article_count = article_count + 1;
+        UPDATE magazine_stats SET contributor_count = contributor_count + 1
+        WHERE magazine_id = {row}.magazine_id
+        AND (SELECT article_count FROM author_magazine_stats WHERE {pair}) = 1;
+        UPDATE author_stats SET magazine_count = magazine_count + 1
+        WHERE author_id = {row}.author_id
+        AND (SELECT article_count FROM author_magazine_stats WHERE {pair}) = 1;
+    '''
+
+
+def _removed(row):
+    pair = f'author_id = {row}.author_id AND magazine_id = {row}.magazine_id'
+    return f'''
+        UPDATE author_magazine_stats SET article_count = article_count - 1 WHERE {pair};
+        UPDATE magazine_stats SET article_count = article_count - 1 WHERE magazine_id = {row}.magazine_id;
+        UPDATE author_stats SET article_count = article_count - 1 WHERE author_id = {row}.author_id;
+        UPDATE magazine_stats SET contributor_count = contributor_count - 1
+        WHERE magazine_id = {row}.magazine_id
+        AND (SELECT article_count FROM author_magazine_stats WHERE {pair}) = 0;
+        UPDATE author_stats SET magazine_count = magazine_count - 1
+        WHERE author_id = {row}.author_id
+        AND (SELECT article_count FROM author_magazine_stats WHERE {pair}) = 0;
+        DELETE FROM author_magazine_stats WHERE {pair} AND article_count = 0;
+    '''
+
+
+def populate_stats(conn):
+    for table in STATS_TABLES:
+        conn.execute(f'DELETE FROM {table}')
+        conn.execute(f'INSERT INTO {table} {COMPUTED_STATS[table]}')
+
+
+def create_stats_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS author_magazine_stats (
+            author_id INTEGER NOT NULL,
+            magazine_id INTEGER NOT NULL,
+            article_count INTEGER NOT NULL,
+            PRIMARY KEY (author_id, magazine_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS magazine_stats (
+            magazine_id INTEGER PRIMARY KEY,
+            article_count INTEGER NOT NULL,
+            contributor_count INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS author_stats (
+            author_id INTEGER PRIMARY KEY,
+            article_count INTEGER NOT NULL,
+            magazine_count INTEGER NOT NULL
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS articles_stats_insert AFTER INSERT ON articles BEGIN
+            {_added('new')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS articles_stats_delete AFTER DELETE ON articles BEGIN
+            {_removed('old')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS articles_stats_update AFTER UPDATE OF author_id, magazine_id ON articles BEGIN
+            {_removed('old')}
+            {_added('new')}
+        END
+    ''')
+    populate_stats(conn)
+
+
+def check_stats(conn):
+    stale = []
+    for table in STATS_TABLES:
+        computed, materialized = COMPUTED_STATS[table], MATERIALIZED_STATS[table]
+        sql = f'''
+            SELECT COUNT(*) FROM (
+                SELECT * FROM ({computed} EXCEPT {materialized})
+                UNION ALL
+                SELECT * FROM ({materialized} EXCEPT {computed})
+            )
+        '''
+        if conn.execute(sql).fetchone()[0]:
+            stale.append(table)
+    return stale
+
+
+def rebuild_stats(conn):
+    with conn:
+        populate_stats(conn)
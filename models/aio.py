@@ -0,0 +1,106 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from database.connection import DATABASE_NAME
+from database.pool import ConnectionPool
+from models.article import Article
+from models.author import Author
+from models.magazine import Magazine
+
+DEFAULT_READERS = 4
+
+
+def _detached(result):
+    if isinstance(result, list):
+        return [_detached(obj) for obj in result]
+    if isinstance(result, Article):
+        article = Article.from_row((result.id, result._title, result.author_id, result.magazine_id))
+        article._content = result._content
+        article._author = _detached(result._author)
+        article._magazine = _detached(result._magazine)
+        return article
+    if isinstance(result, Author):
+        return Author.from_row((result._id, result._name))
+    if isinstance(result, Magazine):
+        return Magazine.from_row((result._id, result._name, result._category))
+    return result
+
+
+class AsyncDatabase:
+    # Results are detached copies with conn=None: lazy loading would run
+    # blocking SQL on the event loop against a pooled connection owned by
+    # another thread. Request related objects and bodies through include;
+    # anything else raises DetachedError.
+    def __init__(self, database=DATABASE_NAME, readers=DEFAULT_READERS, pragmas=None):
+        self._read_pool = ConnectionPool(database, pragmas)
+        self._write_pool = ConnectionPool(database, pragmas)
+        self._read_executor = ThreadPoolExecutor(readers, thread_name_prefix="db-reader")
+        self._write_executor = ThreadPoolExecutor(1, thread_name_prefix="db-writer")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @staticmethod
+    def _call(pool, func, args):
+        with pool.connection() as conn:
+            return _detached(func(conn, *args))
+
+    async def _read(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, self._call, self._read_pool, func, args)
+
+    async def _write(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._write_executor, self._call, self._write_pool, func, args)
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._shutdown)
+
+    def _shutdown(self):
+        self._write_executor.shutdown(wait=True)
+        self._read_executor.shutdown(wait=True)
+        self._write_pool.close()
+        self._read_pool.close()
+
+    async def author_articles(self, author, include=()):
+        return await self._read(lambda conn: Author.from_id(author, conn).articles(include))
+
+    async def author_magazines(self, author):
+        return await self._read(lambda conn: Author.from_id(author, conn).magazines())
+
+    async def magazine_articles(self, magazine, include=()):
+        return await self._read(lambda conn: Magazine.from_id(magazine, conn).articles(include))
+
+    async def magazine_contributors(self, magazine):
+        return await self._read(lambda conn: Magazine.from_id(magazine, conn).contributors())
+
+    async def get_all_articles(self, include=()):
+        return await self._read(Article.get_all_articles, include)
+
+    async def get_all_authors(self):
+        return await self._read(Author.get_all_authors)
+
+    async def get_all_magazines(self):
+        return await self._read(Magazine.get_all_magazines)
+
+    async def create_author(self, name):
+        return await self._write(lambda conn: Author(name=name, conn=conn))
+
+    async def create_magazine(self, name, category):
+        return await self._write(lambda conn: Magazine(name=name, category=category, conn=conn))
+
+    async def create_article(self, title, content, author, magazine):
+        return await self._write(lambda conn: Article(
+            title=title,
+            content=content,
+            author_id=getattr(author, "id", author),
+            magazine_id=getattr(magazine, "id", magazine),
+            conn=conn,
+        ))
+
+    async def bulk_create_articles(self, records):
+        return await self._write(Article.bulk_create, records)
@@ -1,58 +1,199 @@
+from collections import namedtuple
+
+from database.batch import DEFAULT_BATCH_SIZE, DEFAULT_PAGE_SIZE, chunked, iter_query
+from database.bodies import load_bodies, store_articles
+from database.setup import has_search_index
+from models import queries, registry
+from models.session import DetachedError, session_for
+
+SearchResult = namedtuple("SearchResult", ["article", "rank", "snippet"])
+
+
+def is_valid_title(title):
+    return isinstance(title, str) and 5 <= len(title) <= 50
+
+
 class Article:
+    __slots__ = ("id", "_title", "_content", "author_id", "magazine_id", "conn", "_author", "_magazine")
+
     def __init__(self, id=None, title=None, content=None, author=None, magazine=None, conn=None, author_id=None, magazine_id=None):
         self.id = id
         self._title = None
-        self.content = content
+        self._content = content
         self.author_id = author_id if author_id else (author.id if author else None)
         self.magazine_id = magazine_id if magazine_id else (magazine.id if magazine else None)
         self.conn = conn
+        self._author = author
+        self._magazine = magazine
         if title:
             self.title = title  # This uses the title setter
 
         if conn:
-            self.cursor = self.conn.cursor()
-            self.add_to_database()
+            buffer = session_for(conn).write_behind
+            if buffer is not None:
+                buffer.enqueue_article(self)
+            else:
+                self.add_to_database()
 
     def __repr__(self):
         return f'<Article {self.title}>'
 
+    @property
+    def cursor(self):
+        return session_for(self.conn).cursor
+
     def add_to_database(self):
-        sql = "INSERT INTO articles (title, content, author_id, magazine_id) VALUES (?, ?, ?, ?)"
-        self.cursor.execute(sql, (self.title, self.content, self.author_id, self.magazine_id))
-        self.conn.commit()
-        self.id = self.cursor.lastrowid
+        with self.conn:
+            self.id = store_articles(self.conn, [(self.title, self._content, self.author_id, self.magazine_id)])[0]
+        session_for(self.conn).changed("articles")
 
     @property
     def title(self):
         if not self._title and self.id:
-            sql = "SELECT title FROM articles WHERE id = ?"
-            row = self.cursor.execute(sql, (self.id,)).fetchone()
+            row = self.cursor.execute(queries.ARTICLE_TITLE, (self.id,)).fetchone()
             if row:
                 self._title = row[0]
         return self._title
 
     @title.setter
     def title(self, title):
-        if isinstance(title, str) and 5 <= len(title) <= 50 and self._title is None:
+        if is_valid_title(title) and self._title is None:
             self._title = title
         else:
             raise ValueError("Title must be a string between 5 and 50 characters long and can only be set once.")
 
+    @property
+    def content(self):
+        if self._content is None and self.id:
+            if self.conn is None:
+                raise DetachedError(f"Content of article {self.id} was not loaded; request it with include=('content',)")
+            self._content = load_bodies(self.conn, [self.id]).get(self.id)
+        return self._content
+
+    @content.setter
+    def content(self, content):
+        self._content = content
+
     def author(self):
-        from models.author import Author
-        sql = "SELECT authors.* FROM articles INNER JOIN authors ON articles.author_id = authors.id WHERE articles.id = ?"
-        row = self.cursor.execute(sql, (self.id,)).fetchone()
-        return Author(id=row[0], name=row[1], conn=self.conn) if row else None
+        if self._author is not None:
+            return self._author
+        if self.author_id is not None:
+            return registry.Author.find_by_id(self.conn, self.author_id)
+        row = self.cursor.execute(queries.ARTICLE_AUTHOR, (self.id,)).fetchone()
+        return session_for(self.conn).identity_map.load(registry.Author, row, self.conn) if row else None
 
     def magazine(self):
-        from models.magazine import Magazine
-        sql = "SELECT magazines.* FROM articles INNER JOIN magazines ON articles.magazine_id = magazines.id WHERE articles.id = ?"
-        row = self.cursor.execute(sql, (self.id,)).fetchone()
-        return Magazine(id=row[0], name=row[1], category=row[2], conn=self.conn) if row else None
+        if self._magazine is not None:
+            return self._magazine
+        if self.magazine_id is not None:
+            return registry.Magazine.find_by_id(self.conn, self.magazine_id)
+        row = self.cursor.execute(queries.ARTICLE_MAGAZINE, (self.id,)).fetchone()
+        return session_for(self.conn).identity_map.load(registry.Magazine, row, self.conn) if row else None
+
+    @classmethod
+    def from_row(cls, row, conn=None):
+        article = cls.__new__(cls)
+        article.id = row[0]
+        article._title = row[1]
+        article._content = None
+        article.author_id = row[2]
+        article.magazine_id = row[3]
+        article.conn = conn
+        article._author = None
+        article._magazine = None
+        return article
+
+    @classmethod
+    def from_rows(cls, rows, conn=None):
+        return [cls.from_row(row, conn) for row in rows]
+
+    @classmethod
+    def load_related(cls, conn, articles, include=()):
+        if "author" in include:
+            authors = registry.Author.find_by_ids(conn, {article.author_id for article in articles if article._author is None})
+            for article in articles:
+                if article._author is None:
+                    article._author = authors.get(article.author_id)
+        if "magazine" in include:
+            magazines = registry.Magazine.find_by_ids(conn, {article.magazine_id for article in articles if article._magazine is None})
+            for article in articles:
+                if article._magazine is None:
+                    article._magazine = magazines.get(article.magazine_id)
+        if "content" in include:
+            bodies = load_bodies(conn, [article.id for article in articles if article._content is None])
+            for article in articles:
+                if article._content is None:
+                    article._content = bodies.get(article.id)
+        return articles
+
+    @classmethod
+    def get_articles_page(cls, conn, after_id=0, limit=DEFAULT_PAGE_SIZE, include=()):
+        rows = conn.execute(queries.ARTICLES_PAGE, (after_id, limit)).fetchall()
+        return cls.load_related(conn, cls.from_rows(rows, conn), include)
+
+    @classmethod
+    def iter_all_articles(cls, conn, batch_size=DEFAULT_BATCH_SIZE, include=()):
+        for rows in iter_query(conn, queries.ALL_ARTICLES, (), batch_size):
+            yield from cls.load_related(conn, cls.from_rows(rows, conn), include)
+
+    @classmethod
+    def get_all_articles(cls, conn, include=()):
+        return list(cls.iter_all_articles(conn, include=include))
+
+    @classmethod
+    def resolve_records(cls, conn, records, chunk_size=DEFAULT_BATCH_SIZE):
+        # Validates the records and turns author and magazine names into ids,
+        # creating whichever are missing, ready for store_articles.
+        for record in records:
+            if not is_valid_title(record["title"]):
+                raise ValueError(f"Invalid title {record['title']!r}: must be a string between 5 and 50 characters long")
+        author_names = [record["author"] for record in records if record.get("author_id") is None]
+        magazines = [(record["magazine"], record["category"]) for record in records if record.get("magazine_id") is None]
+        author_ids = dict(zip(author_names, registry.Author.bulk_create(conn, author_names, chunk_size)))
+        magazine_ids = dict(zip((name for name, _ in magazines), registry.Magazine.bulk_create(conn, magazines, chunk_size)))
+        return [
+            (
+                record["title"],
+                record["content"],
+                record["author_id"] if record.get("author_id") is not None else author_ids[record["author"]],
+                record["magazine_id"] if record.get("magazine_id") is not None else magazine_ids[record["magazine"]],
+            )
+            for record in records
+        ]
+
+    @classmethod
+    def bulk_create(cls, conn, records, chunk_size=DEFAULT_BATCH_SIZE):
+        ids = []
+        for chunk in chunked(records, chunk_size):
+            rows = cls.resolve_records(conn, chunk, chunk_size)
+            with conn:
+                ids.extend(store_articles(conn, rows))
+            session_for(conn).changed("articles")
+        return ids
+
+    @classmethod
+    def search(cls, conn, query, limit=20, magazine_id=None, author_id=None, highlight=("[", "]")):
+        if not has_search_index(conn):
+            return cls.search_like(conn, query, limit, magazine_id, author_id)
+        terms = " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+        if not terms:
+            return []
+        params = (highlight[0], highlight[1], terms, magazine_id, magazine_id, author_id, author_id, limit)
+        rows = conn.execute(queries.ARTICLE_SEARCH, params).fetchall()
+        return [SearchResult(cls.from_row(row, conn), row[4], row[5]) for row in rows]
 
     @classmethod
-    def get_all_articles(cls, conn):
-        sql = "SELECT * FROM articles"
-        cursor = conn.cursor()
-        articles = cursor.execute(sql).fetchall()
-        return [cls(id=row[0], title=row[1], content=row[2], author_id=row[3], magazine_id=row[4], conn=conn) for row in articles]
+    def search_like(cls, conn, query, limit=20, magazine_id=None, author_id=None):
+        # Bodies are compressed, so the match runs in Python over each batch
+        # instead of with LIKE.
+        needle = query.casefold()
+        sql, params = queries.filtered_articles(magazine_id, author_id)
+        results = []
+        for rows in iter_query(conn, sql, params):
+            articles = cls.load_related(conn, cls.from_rows(rows, conn), ("content",))
+            for article in articles:
+                if needle in article._title.casefold() or needle in (article._content or "").casefold():
+                    results.append(SearchResult(article, None, article._title))
+                    if len(results) >= limit:
+                        return results
+        return results
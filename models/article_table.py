@@ -0,0 +1,44 @@
+from array import array
+from collections import Counter
+
+from database.batch import DEFAULT_BATCH_SIZE, iter_batches
+from models import queries
+
+
+class ArticleTable:
+    __slots__ = ("ids", "author_ids", "magazine_ids", "titles")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.author_ids = array("q")
+        self.magazine_ids = array("q")
+        self.titles = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return zip(self.ids, self.titles, self.author_ids, self.magazine_ids)
+
+    def extend(self, rows):
+        for row in rows:
+            self.ids.append(row[0])
+            self.titles.append(row[1])
+            self.author_ids.append(row[2] or 0)
+            self.magazine_ids.append(row[3] or 0)
+
+    @classmethod
+    def load(cls, conn, author_id=None, magazine_id=None, batch_size=DEFAULT_BATCH_SIZE):
+        sql, params = queries.filtered_articles(magazine_id, author_id)
+        table = cls()
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        for rows in iter_batches(cursor, batch_size):
+            table.extend(rows)
+        return table
+
+    def counts_by_author(self):
+        return Counter(self.author_ids)
+
+    def counts_by_magazine(self):
+        return Counter(self.magazine_ids)
@@ -1,11 +1,21 @@
+from database.batch import DEFAULT_BATCH_SIZE, DEFAULT_PAGE_SIZE, SQLITE_MAX_VARIABLES, chunked, iter_query, padded, placeholders
+from models import queries, registry
+from models.session import session_for
+
+
+def is_valid_name(name):
+    return isinstance(name, str) and len(name) > 0
+
+
 class Author:
+    __slots__ = ("_id", "_name", "conn")
+
     def __init__(self, id=None, name=None, conn=None):
         self._id = id
         self._name = name
         self.conn = conn
 
         if conn:
-            self.cursor = conn.cursor()
             self._initialize_author()
 
     def __repr__(self):
@@ -19,26 +29,33 @@ class Author:
     def __hash__(self):
         return hash((self._id, self._name))
 
+    @property
+    def cursor(self):
+        return session_for(self.conn).cursor
+
     def _initialize_author(self):
-        if self._name:
+        buffer = session_for(self.conn).write_behind
+        if self._name and buffer is not None:
+            buffer.enqueue_author(self)
+        elif self._name:
             self._ensure_author_in_db()
         elif self._id:
             self._fetch_name_from_db()
 
     def _ensure_author_in_db(self):
-        sql_check = "SELECT id FROM authors WHERE name = ? LIMIT 1"
-        result = self.cursor.execute(sql_check, (self._name,)).fetchone()
-        if result:
-            self._id = result[0]
+        cursor = self.cursor
+        cursor.execute(queries.AUTHOR_INSERT, (self._name,))
+        self.conn.commit()
+        if cursor.rowcount:
+            self._id = cursor.lastrowid
         else:
-            sql_insert = "INSERT INTO authors(name) VALUES (?)"
-            self.cursor.execute(sql_insert, (self._name,))
-            self.conn.commit()
-            self._id = self.cursor.lastrowid
+            self._id = cursor.execute(queries.AUTHOR_ID_BY_NAME, (self._name,)).fetchone()[0]
+        session = session_for(self.conn)
+        session.identity_map.invalidate(Author, self._id)
+        session.changed("authors")
 
     def _fetch_name_from_db(self):
-        sql = "SELECT name FROM authors WHERE id = ?"
-        result = self.cursor.execute(sql, (self._id,)).fetchone()
+        result = self.cursor.execute(queries.AUTHOR_NAME, (self._id,)).fetchone()
         if result:
             self._name = result[0]
 
@@ -63,29 +80,142 @@ class Author:
 
     @name.setter
     def name(self, value):
-        if isinstance(value, str) and value:
+        if is_valid_name(value):
             self._name = value
         else:
             raise ValueError("Invalid name value")
 
-    def articles(self):
-        from models.article import Article
-        sql = "SELECT * FROM articles WHERE author_id = ?"
-        rows = self.cursor.execute(sql, (self._id,)).fetchall()
-        return [Article(id=row[0], title=row[1], content=row[2], author_id=row[3], magazine_id=row[4], conn=self.conn) for row in rows]
+    def _hydrate_articles(self, rows, include):
+        articles = registry.Article.from_rows(rows, self.conn)
+        if "author" in include:
+            for article in articles:
+                article._author = self
+        return registry.Article.load_related(self.conn, articles, include)
+
+    def _hydrate_magazines(self, rows):
+        identity_map = session_for(self.conn).identity_map
+        return [identity_map.load(registry.Magazine, row, self.conn) for row in rows]
+
+    def articles_page(self, after_id=0, limit=DEFAULT_PAGE_SIZE, include=()):
+        params = (self._id, after_id, limit)
+        rows = session_for(self.conn).fetch_all(queries.AUTHOR_ARTICLES_PAGE, params, ("articles",))
+        return self._hydrate_articles(rows, include)
+
+    def iter_articles(self, batch_size=DEFAULT_BATCH_SIZE, include=()):
+        session = session_for(self.conn)
+        for rows in session.iter_query(queries.AUTHOR_ARTICLES, (self._id,), ("articles",), batch_size):
+            yield from self._hydrate_articles(rows, include)
+
+    def articles(self, include=()):
+        return list(self.iter_articles(include=include))
+
+    def magazines_page(self, after_id=0, limit=DEFAULT_PAGE_SIZE):
+        params = (self._id, after_id, limit)
+        rows = session_for(self.conn).fetch_all(queries.AUTHOR_MAGAZINES_PAGE, params, ("articles", "magazines"))
+        return self._hydrate_magazines(rows)
+
+    def iter_magazines(self, batch_size=DEFAULT_BATCH_SIZE):
+        session = session_for(self.conn)
+        for rows in session.iter_query(queries.AUTHOR_MAGAZINES, (self._id,), ("articles", "magazines"), batch_size):
+            yield from self._hydrate_magazines(rows)
 
     def magazines(self):
-        from models.magazine import Magazine
-        sql = """SELECT DISTINCT magazines.id, magazines.name, magazines.category
-                 FROM magazines
-                 INNER JOIN articles ON articles.magazine_id = magazines.id
-                 WHERE articles.author_id = ?"""
-        rows = self.cursor.execute(sql, (self._id,)).fetchall()
-        return [Magazine(id=row[0], name=row[1], category=row[2], conn=self.conn) for row in rows]
+        return list(self.iter_magazines())
+
+    def article_count(self, magazine=None):
+        if magazine is None:
+            sql = queries.AUTHOR_ARTICLE_COUNT
+            params = (self._id,)
+        else:
+            sql = queries.AUTHOR_MAGAZINE_ARTICLE_COUNT
+            params = (self._id, getattr(magazine, "id", magazine))
+        row = self.cursor.execute(sql, params).fetchone()
+        return row[0] if row else 0
+
+    def magazine_count(self):
+        row = self.cursor.execute(queries.AUTHOR_MAGAZINE_COUNT, (self._id,)).fetchone()
+        return row[0] if row else 0
+
+    @classmethod
+    def from_row(cls, row, conn=None):
+        author = cls.__new__(cls)
+        author._id = row[0]
+        author._name = row[1]
+        author.conn = conn
+        return author
+
+    @classmethod
+    def from_rows(cls, rows, conn=None):
+        return [cls.from_row(row, conn) for row in rows]
+
+    @classmethod
+    def from_id(cls, author, conn=None):
+        return cls.from_row((getattr(author, "id", author), None), conn)
+
+    @classmethod
+    def find_by_id(cls, conn, id):
+        identity_map = session_for(conn).identity_map
+        author = identity_map.get((cls, id))
+        if author is None:
+            row = conn.execute(queries.AUTHOR_BY_ID, (id,)).fetchone()
+            if row is None:
+                return None
+            author = cls.from_row(row, conn)
+            identity_map.add((cls, id), author)
+        return author
+
+    @classmethod
+    def find_by_ids(cls, conn, ids):
+        identity_map = session_for(conn).identity_map
+        authors = {}
+        missing = []
+        for id in ids:
+            author = identity_map.get((cls, id))
+            if author is None:
+                missing.append(id)
+            else:
+                authors[id] = author
+        for chunk in chunked(missing, SQLITE_MAX_VARIABLES):
+            chunk = padded(chunk)
+            sql = queries.AUTHORS_BY_IDS.format(placeholders=placeholders(len(chunk)))
+            for row in conn.execute(sql, chunk):
+                authors[row[0]] = identity_map.load(cls, row, conn)
+        return authors
+
+    @classmethod
+    def get_authors_page(cls, conn, after_id=0, limit=DEFAULT_PAGE_SIZE):
+        return cls.from_rows(conn.execute(queries.AUTHORS_PAGE, (after_id, limit)).fetchall(), conn)
+
+    @classmethod
+    def iter_all_authors(cls, conn, batch_size=DEFAULT_BATCH_SIZE):
+        for rows in iter_query(conn, queries.ALL_AUTHORS, (), batch_size):
+            yield from cls.from_rows(rows, conn)
 
     @classmethod
     def get_all_authors(cls, conn):
-        sql = "SELECT * FROM authors"
-        cursor = conn.cursor()
-        authors = cursor.execute(sql).fetchall()
-        return [cls(id=author[0], name=author[1], conn=conn) for author in authors]
+        return list(cls.iter_all_authors(conn))
+
+    @classmethod
+    def find_ids_by_name(cls, conn, names):
+        ids = {}
+        for chunk in chunked(set(names), SQLITE_MAX_VARIABLES):
+            chunk = padded(chunk)
+            sql = queries.AUTHOR_IDS_BY_NAMES.format(placeholders=placeholders(len(chunk)))
+            for row in conn.execute(sql, chunk):
+                ids.setdefault(row[1], row[0])
+        return ids
+
+    @classmethod
+    def bulk_create(cls, conn, names, chunk_size=DEFAULT_BATCH_SIZE):
+        names = list(names)
+        for name in names:
+            if not is_valid_name(name):
+                raise ValueError("Invalid name value")
+        for chunk in chunked(dict.fromkeys(names), chunk_size):
+            with conn:
+                conn.executemany(queries.AUTHOR_INSERT, [(name,) for name in chunk])
+        ids = cls.find_ids_by_name(conn, names)
+        session = session_for(conn)
+        session.identity_map.invalidate(cls, *ids.values())
+        session.changed("authors")
+        return [ids[name] for name in names]
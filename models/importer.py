@@ -0,0 +1,198 @@
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from database.batch import DEFAULT_BATCH_SIZE
+from database.bodies import store_articles
+from models.article import is_valid_title
+from models.author import Author, is_valid_name as is_valid_author_name
+from models.magazine import Magazine, is_valid_category, is_valid_name as is_valid_magazine_name
+from models.session import session_for
+
+FIELDS = ("title", "content", "author", "magazine", "category")
+MAX_ERRORS = 100
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    raise ValueError(f"Unsupported import format: {extension or path}")
+
+
+def read_items(path, format):
+    # JSON lines are decoded in the workers; CSV has to be split here because
+    # quoted fields may span several lines. Blank JSON lines are passed on so
+    # positions stay equal to line numbers.
+    with open(path, newline="", encoding="utf-8") as source:
+        if format == "csv":
+            yield from csv.DictReader(source)
+        else:
+            yield from source
+
+
+def validate_record(record):
+    if not isinstance(record, dict):
+        return "Record must be an object"
+    if not is_valid_title(record.get("title")):
+        return "Title must be a string between 5 and 50 characters long"
+    if not isinstance(record.get("content"), str):
+        return "Content must be a string"
+    if not is_valid_author_name(record.get("author")):
+        return "Author name must be a non-empty string"
+    if not is_valid_magazine_name(record.get("magazine")):
+        return "Magazine name must be a string between 2 and 16 characters"
+    if not is_valid_category(record.get("category")):
+        return "Category must be a non-empty string"
+    return None
+
+
+def validate_batch(format, start, items):
+    records = []
+    errors = []
+    for position, item in enumerate(items, start=start + 1):
+        if format == "jsonl":
+            if not item.strip():
+                continue
+            try:
+                item = json.loads(item)
+            except ValueError as error:
+                errors.append((position, f"Invalid JSON: {error}"))
+                continue
+        error = validate_record(item)
+        if error:
+            errors.append((position, error))
+        else:
+            records.append(tuple(item[field] for field in FIELDS))
+    return start + len(items), records, errors
+
+
+class ImportResult:
+    def __init__(self, source, format, skipped=0):
+        self.source = source
+        self.format = format
+        self.skipped = skipped
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    @property
+    def processed(self):
+        return self.imported + self.rejected
+
+    @property
+    def rows_per_second(self):
+        return self.processed / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return f"<ImportResult {self.imported} imported, {self.rejected} rejected, {self.rows_per_second:.0f} rows/s>"
+
+
+def load_checkpoint(conn, source):
+    row = conn.execute("SELECT rows FROM import_checkpoints WHERE source = ?", (source,)).fetchone()
+    return row[0] if row else 0
+
+
+def clear_checkpoint(conn, source):
+    with conn:
+        conn.execute("DELETE FROM import_checkpoints WHERE source = ?", (source,))
+
+
+class Importer:
+    def __init__(self, conn, chunk_size=DEFAULT_BATCH_SIZE * 10, workers=None):
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self.workers = os.cpu_count() if workers is None else workers
+        self.author_ids = {}
+        self.magazine_ids = {}
+
+    def _resolve_authors(self, records):
+        names = list(dict.fromkeys(record[2] for record in records if record[2] not in self.author_ids))
+        if names:
+            self.author_ids.update(zip(names, Author.bulk_create(self.conn, names, self.chunk_size)))
+
+    def _resolve_magazines(self, records):
+        magazines = {}
+        for record in records:
+            if record[3] not in self.magazine_ids:
+                magazines.setdefault(record[3], record[4])
+        if magazines:
+            ids = Magazine.bulk_create(self.conn, magazines.items(), self.chunk_size)
+            self.magazine_ids.update(zip(magazines, ids))
+
+    def write(self, source, position, records):
+        self._resolve_authors(records)
+        self._resolve_magazines(records)
+        rows = [
+            (title, content, self.author_ids[author], self.magazine_ids[magazine])
+            for title, content, author, magazine, _ in records
+        ]
+        # The checkpoint is committed with the rows, so a resumed import
+        # never repeats or skips a chunk.
+        with self.conn:
+            store_articles(self.conn, rows)
+            self.conn.execute(
+                "INSERT INTO import_checkpoints (source, rows) VALUES (?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET rows = excluded.rows",
+                (source, position),
+            )
+        if rows:
+            session_for(self.conn).changed("articles")
+
+    def _batches(self, path, format, skip):
+        items = islice(read_items(path, format), skip, None)
+        start = skip
+        while True:
+            batch = list(islice(items, self.chunk_size))
+            if not batch:
+                break
+            yield start, batch
+            start += len(batch)
+
+    def _validated(self, path, format, skip):
+        if not self.workers:
+            for start, batch in self._batches(path, format, skip):
+                yield validate_batch(format, start, batch)
+            return
+        # Keep a bounded number of batches in flight so parsing, validation
+        # and writing overlap without reading the whole file into memory.
+        with ProcessPoolExecutor(self.workers) as executor:
+            pending = deque()
+            for start, batch in self._batches(path, format, skip):
+                pending.append(executor.submit(validate_batch, format, start, batch))
+                if len(pending) >= self.workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def run(self, path, format=None, resume=True, progress=None):
+        format = format or detect_format(path)
+        source = os.path.abspath(path)
+        if resume:
+            skip = load_checkpoint(self.conn, source)
+        else:
+            clear_checkpoint(self.conn, source)
+            skip = 0
+        result = ImportResult(source, format, skip)
+        for position, records, errors in self._validated(path, format, skip):
+            self.write(source, position, records)
+            result.imported += len(records)
+            result.rejected += len(errors)
+            result.errors.extend(errors[:MAX_ERRORS - len(result.errors)])
+            result.seconds = time.perf_counter() - result.started
+            if progress:
+                progress(result)
+        result.seconds = time.perf_counter() - result.started
+        return result
+
+
+def import_file(conn, path, format=None, resume=True, chunk_size=DEFAULT_BATCH_SIZE * 10, workers=None, progress=None):
+    return Importer(conn, chunk_size, workers).run(path, format, resume, progress)
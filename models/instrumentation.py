@@ -0,0 +1,197 @@
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+from database.connection import Connection
+from models.article import Article
+from models.author import Author
+from models.magazine import Magazine
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+DEFAULT_SLOW_SECONDS = 0.1
+
+INSTRUMENTED_METHODS = {
+    Article: (
+        "__init__", "author", "magazine", "load_related", "get_articles_page", "get_all_articles",
+        "bulk_create", "search", "search_like",
+    ),
+    Author: (
+        "__init__", "articles", "articles_page", "magazines", "magazines_page", "article_count", "magazine_count",
+        "find_by_id", "find_by_ids", "find_ids_by_name", "get_authors_page", "get_all_authors", "bulk_create",
+    ),
+    Magazine: (
+        "__init__", "articles", "articles_page", "contributors", "contributors_page", "article_count",
+        "contributor_count", "article_titles", "author_article_counts", "top_contributors", "contributing_authors",
+        "find_by_id", "find_by_ids", "find_ids_by_name", "get_magazines_page", "get_all_magazines", "bulk_create",
+    ),
+}
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+_local = threading.local()
+_install_lock = threading.Lock()
+
+
+def query_shape(sql):
+    shape = _LITERALS.sub("?", sql)
+    shape = _LISTS.sub("(?)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+class MethodStats:
+    __slots__ = ("calls", "queries", "rows", "seconds", "max_seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.queries = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def __repr__(self):
+        return f"<MethodStats calls={self.calls} queries={self.queries} rows={self.rows} seconds={self.seconds:.6f}>"
+
+
+class _Frame:
+    __slots__ = ("name", "shapes")
+
+    def __init__(self, name):
+        self.name = name
+        self.shapes = Counter()
+
+
+class Profile:
+    def __init__(self, n_plus_one_threshold=DEFAULT_N_PLUS_ONE_THRESHOLD, slow_seconds=DEFAULT_SLOW_SECONDS):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_seconds = slow_seconds
+        self.methods = defaultdict(MethodStats)
+        self.queries = []
+        self.n_plus_one = []
+        self.slow_calls = []
+        self._frames = []
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    def statement(self, sql, many=False):
+        self.queries.append((self._frames[-1].name if self._frames else None, sql))
+        shape = query_shape(sql)
+        for frame in self._frames:
+            self.methods[frame.name].queries += 1
+            # One executemany() is a batch, not a query per row.
+            if not many:
+                frame.shapes[shape] += 1
+
+    def enter(self, name):
+        self._frames.append(_Frame(name))
+
+    def exit(self, name, seconds, result):
+        frame = self._frames.pop()
+        stats = self.methods[name]
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        if isinstance(result, (list, tuple)):
+            stats.rows += len(result)
+        elif isinstance(result, (Article, Author, Magazine)):
+            stats.rows += 1
+        if seconds >= self.slow_seconds:
+            self.slow_calls.append((name, seconds))
+        for shape, count in frame.shapes.items():
+            if count >= self.n_plus_one_threshold:
+                self.n_plus_one.append((name, shape, count))
+
+    def report(self):
+        lines = [f"{'method':<36} {'calls':>6} {'queries':>8} {'rows':>8} {'total ms':>10} {'max ms':>9}"]
+        for name, stats in sorted(self.methods.items(), key=lambda item: -item[1].seconds):
+            lines.append(
+                f"{name:<36} {stats.calls:>6} {stats.queries:>8} {stats.rows:>8} "
+                f"{stats.seconds * 1000:>10.3f} {stats.max_seconds * 1000:>9.3f}"
+            )
+        for name, shape, count in self.n_plus_one:
+            lines.append(f"N+1 in {name}: {count} x {shape}")
+        for name, seconds in self.slow_calls:
+            lines.append(f"slow call {name}: {seconds * 1000:.3f} ms")
+        return "\n".join(lines)
+
+
+def current_profile():
+    return getattr(_local, "profile", None)
+
+
+def instrumented(name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = getattr(_local, "profile", None)
+            if profile is None:
+                return func(*args, **kwargs)
+            profile.enter(name)
+            start = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                profile.exit(name, time.perf_counter() - start, result)
+        wrapper.__instrumented__ = True
+        return wrapper
+    return decorator
+
+
+def _instrument(cls, attribute):
+    member = cls.__dict__[attribute]
+    name = f"{cls.__name__}.{attribute}"
+    if isinstance(member, classmethod):
+        if not getattr(member.__func__, "__instrumented__", False):
+            setattr(cls, attribute, classmethod(instrumented(name)(member.__func__)))
+    elif not getattr(member, "__instrumented__", False):
+        setattr(cls, attribute, instrumented(name)(member))
+
+
+def install():
+    with _install_lock:
+        for cls, attributes in INSTRUMENTED_METHODS.items():
+            for attribute in attributes:
+                _instrument(cls, attribute)
+
+
+def _chained(hook, previous):
+    if previous is None:
+        return hook
+
+    def chained(sql, many):
+        previous(sql, many)
+        hook(sql, many)
+    return chained
+
+
+@contextmanager
+def capture(*connections, n_plus_one_threshold=DEFAULT_N_PLUS_ONE_THRESHOLD, slow_seconds=DEFAULT_SLOW_SECONDS):
+    install()
+    profile = Profile(n_plus_one_threshold, slow_seconds)
+    previous = current_profile()
+    _local.profile = profile
+    # Statements are recorded per connection, from whichever thread runs
+    # them; method frames are per thread. A hook that was already installed,
+    # such as an enclosing capture, keeps receiving statements and is put
+    # back afterwards.
+    hooks = []
+    for conn in connections:
+        if not isinstance(conn, Connection):
+            raise TypeError("Connection must be opened with get_db_connection() or factory=Connection")
+    for conn in connections:
+        hooks.append(conn.statement_hook)
+        conn.statement_hook = _chained(profile.statement, conn.statement_hook)
+    try:
+        yield profile
+    finally:
+        for conn, hook in zip(connections, hooks):
+            conn.statement_hook = hook
+        _local.profile = previous
@@ -1,28 +1,49 @@
-from models.author import Author
+from database.batch import DEFAULT_BATCH_SIZE, DEFAULT_PAGE_SIZE, SQLITE_MAX_VARIABLES, chunked, iter_query, padded, placeholders
+from models import queries, registry
+from models.session import session_for
+
+
+def is_valid_name(name):
+    return isinstance(name, str) and 2 <= len(name) <= 16
+
+
+def is_valid_category(category):
+    return isinstance(category, str) and len(category) > 0
+
 
 class Magazine:
+    __slots__ = ("_id", "_name", "_category", "conn")
+
     def __init__(self, name=None, id=None, category=None, conn=None):
         self._id = id
         self._name = name
         self._category = category
         self.conn = conn
         if conn:
-            self.cursor = self.conn.cursor()
-            self.add_to_database()
+            buffer = session_for(conn).write_behind
+            if buffer is not None:
+                buffer.enqueue_magazine(self)
+            else:
+                self.add_to_database()
 
     def __repr__(self):
         return f'<Magazine {self.name}>'
 
+    @property
+    def cursor(self):
+        return session_for(self.conn).cursor
+
     def add_to_database(self):
-        sql_check = "SELECT id FROM magazines WHERE name = ?"
-        result = self.cursor.execute(sql_check, (self.name,)).fetchone()
-        if result:
-            self.id = result[0]
+        cursor = self.cursor
+        cursor.execute(queries.MAGAZINE_INSERT, (self.name, self.category))
+        self.conn.commit()
+        if cursor.rowcount:
+            self.id = cursor.lastrowid
         else:
-            sql = "INSERT INTO magazines(name, category) VALUES (?, ?)"
-            self.cursor.execute(sql, (self.name, self.category))
-            self.conn.commit()
-            self.id = self.cursor.lastrowid
+            self.id = cursor.execute(queries.MAGAZINE_ID_BY_NAME, (self.name,)).fetchone()[0]
+        session = session_for(self.conn)
+        session.identity_map.invalidate(Magazine, self.id)
+        session.changed("magazines")
 
     @property
     def id(self):
@@ -38,15 +59,14 @@ class Magazine:
     @property
     def name(self):
         if not hasattr(self, "_name"):
-            sql = "SELECT name FROM magazines WHERE id = ?"
-            row = self.cursor.execute(sql, (self.id,)).fetchone()
+            row = self.cursor.execute(queries.MAGAZINE_NAME, (self.id,)).fetchone()
             if row:
                 self._name = row[0]
         return self._name
 
     @name.setter
     def name(self, name):
-        if isinstance(name, str) and 2 <= len(name) <= 16:
+        if is_valid_name(name):
             self._name = name
         else:
             raise ValueError("Name must be a string between 2 and 16 characters")
@@ -54,48 +74,163 @@ class Magazine:
     @property
     def category(self):
         if not hasattr(self, "_category"):
-            sql = "SELECT category FROM magazines WHERE id = ?"
-            row = self.cursor.execute(sql, (self.id,)).fetchone()
+            row = self.cursor.execute(queries.MAGAZINE_CATEGORY, (self.id,)).fetchone()
             if row:
                 self._category = row[0]
         return self._category
 
     @category.setter
     def category(self, category):
-        if isinstance(category, str) and len(category) > 0:
+        if is_valid_category(category):
             self._category = category
         else:
             raise ValueError("Category must be a non-empty string")
 
-    def articles(self):
-        from models.article import Article
-        sql = "SELECT * FROM articles WHERE magazine_id = ?"
-        rows = self.cursor.execute(sql, (self.id,)).fetchall()
-        return [Article(id=row[0], title=row[1], content=row[2], author_id=row[3], magazine_id=row[4], conn=self.conn) for row in rows]
+    def _hydrate_articles(self, rows, include):
+        articles = registry.Article.from_rows(rows, self.conn)
+        if "magazine" in include:
+            for article in articles:
+                article._magazine = self
+        return registry.Article.load_related(self.conn, articles, include)
+
+    def _hydrate_contributors(self, rows):
+        identity_map = session_for(self.conn).identity_map
+        return [identity_map.load(registry.Author, row, self.conn) for row in rows]
+
+    def articles_page(self, after_id=0, limit=DEFAULT_PAGE_SIZE, include=()):
+        params = (self.id, after_id, limit)
+        rows = session_for(self.conn).fetch_all(queries.MAGAZINE_ARTICLES_PAGE, params, ("articles",))
+        return self._hydrate_articles(rows, include)
+
+    def iter_articles(self, batch_size=DEFAULT_BATCH_SIZE, include=()):
+        session = session_for(self.conn)
+        for rows in session.iter_query(queries.MAGAZINE_ARTICLES, (self.id,), ("articles",), batch_size):
+            yield from self._hydrate_articles(rows, include)
+
+    def articles(self, include=()):
+        return list(self.iter_articles(include=include))
+
+    def contributors_page(self, after_id=0, limit=DEFAULT_PAGE_SIZE):
+        params = (self.id, after_id, limit)
+        rows = session_for(self.conn).fetch_all(queries.MAGAZINE_CONTRIBUTORS_PAGE, params, ("articles", "authors"))
+        return self._hydrate_contributors(rows)
+
+    def iter_contributors(self, batch_size=DEFAULT_BATCH_SIZE):
+        session = session_for(self.conn)
+        for rows in session.iter_query(queries.MAGAZINE_CONTRIBUTORS, (self.id,), ("articles", "authors"), batch_size):
+            yield from self._hydrate_contributors(rows)
 
     def contributors(self):
-        sql = """SELECT DISTINCT authors.*
-                 FROM authors
-                 INNER JOIN articles ON authors.id = articles.author_id
-                 WHERE articles.magazine_id = ?"""
-        rows = self.cursor.execute(sql, (self.id,)).fetchall()
-        return [Author(name=row[1], conn=self.conn) for row in rows]
+        return list(self.iter_contributors())
+
+    @classmethod
+    def from_row(cls, row, conn=None):
+        magazine = cls.__new__(cls)
+        magazine._id = row[0]
+        magazine._name = row[1]
+        magazine._category = row[2]
+        magazine.conn = conn
+        return magazine
+
+    @classmethod
+    def from_rows(cls, rows, conn=None):
+        return [cls.from_row(row, conn) for row in rows]
+
+    @classmethod
+    def from_id(cls, magazine, conn=None):
+        return cls.from_row((getattr(magazine, "id", magazine), None, None), conn)
+
+    @classmethod
+    def find_by_id(cls, conn, id):
+        identity_map = session_for(conn).identity_map
+        magazine = identity_map.get((cls, id))
+        if magazine is None:
+            row = conn.execute(queries.MAGAZINE_BY_ID, (id,)).fetchone()
+            if row is None:
+                return None
+            magazine = cls.from_row(row, conn)
+            identity_map.add((cls, id), magazine)
+        return magazine
+
+    @classmethod
+    def find_by_ids(cls, conn, ids):
+        identity_map = session_for(conn).identity_map
+        magazines = {}
+        missing = []
+        for id in ids:
+            magazine = identity_map.get((cls, id))
+            if magazine is None:
+                missing.append(id)
+            else:
+                magazines[id] = magazine
+        for chunk in chunked(missing, SQLITE_MAX_VARIABLES):
+            chunk = padded(chunk)
+            sql = queries.MAGAZINES_BY_IDS.format(placeholders=placeholders(len(chunk)))
+            for row in conn.execute(sql, chunk):
+                magazines[row[0]] = identity_map.load(cls, row, conn)
+        return magazines
+
+    @classmethod
+    def get_magazines_page(cls, conn, after_id=0, limit=DEFAULT_PAGE_SIZE):
+        return cls.from_rows(conn.execute(queries.MAGAZINES_PAGE, (after_id, limit)).fetchall(), conn)
+
+    @classmethod
+    def iter_all_magazines(cls, conn, batch_size=DEFAULT_BATCH_SIZE):
+        for rows in iter_query(conn, queries.ALL_MAGAZINES, (), batch_size):
+            yield from cls.from_rows(rows, conn)
 
     @classmethod
     def get_all_magazines(cls, conn):
-        sql = "SELECT * FROM magazines"
-        cursor = conn.cursor()
-        rows = cursor.execute(sql).fetchall()
-        return [cls(id=row[0], name=row[1], category=row[2], conn=conn) for row in rows]
+        return list(cls.iter_all_magazines(conn))
+
+    @classmethod
+    def find_ids_by_name(cls, conn, names):
+        ids = {}
+        for chunk in chunked(set(names), SQLITE_MAX_VARIABLES):
+            chunk = padded(chunk)
+            sql = queries.MAGAZINE_IDS_BY_NAMES.format(placeholders=placeholders(len(chunk)))
+            for row in conn.execute(sql, chunk):
+                ids.setdefault(row[1], row[0])
+        return ids
+
+    @classmethod
+    def bulk_create(cls, conn, records, chunk_size=DEFAULT_BATCH_SIZE):
+        records = list(records)
+        for name, category in records:
+            if not is_valid_name(name):
+                raise ValueError("Name must be a string between 2 and 16 characters")
+            if not is_valid_category(category):
+                raise ValueError("Category must be a non-empty string")
+        for chunk in chunked(dict.fromkeys(records), chunk_size):
+            with conn:
+                conn.executemany(queries.MAGAZINE_INSERT, chunk)
+        names = [name for name, _ in records]
+        ids = cls.find_ids_by_name(conn, names)
+        session = session_for(conn)
+        session.identity_map.invalidate(cls, *ids.values())
+        session.changed("magazines")
+        return [ids[name] for name in names]
+
+    def article_count(self):
+        row = self.cursor.execute(queries.MAGAZINE_ARTICLE_COUNT, (self.id,)).fetchone()
+        return row[0] if row else 0
+
+    def contributor_count(self):
+        row = self.cursor.execute(queries.MAGAZINE_CONTRIBUTOR_COUNT, (self.id,)).fetchone()
+        return row[0] if row else 0
 
     def article_titles(self):
-        return [article.title for article in self.articles()] or None
-
-    def contributing_authors(self):
-        authors_dict = {}
-        for author in self.contributors():
-            sql = "SELECT COUNT(*) FROM articles WHERE author_id = ? AND magazine_id = ?"
-            count = self.cursor.execute(sql, (author.id, self.id)).fetchone()[0]
-            if count > 2:
-                authors_dict[author.id] = author
-        return list(authors_dict.values()) or None
+        rows = session_for(self.conn).fetch_all(queries.MAGAZINE_ARTICLE_TITLES, (self.id,), ("articles",))
+        return [row[0] for row in rows] or None
+
+    def author_article_counts(self, min_articles=1, limit=None):
+        params = (self.id, min_articles, -1 if limit is None else limit)
+        rows = self.cursor.execute(queries.MAGAZINE_AUTHOR_ARTICLE_COUNTS, params).fetchall()
+        identity_map = session_for(self.conn).identity_map
+        return [(identity_map.load(registry.Author, row, self.conn), row[2]) for row in rows]
+
+    def top_contributors(self, limit=5):
+        return [author for author, _ in self.author_article_counts(limit=limit)]
+
+    def contributing_authors(self, more_than=2):
+        return [author for author, _ in self.author_article_counts(min_articles=more_than + 1)] or None
@@ -0,0 +1,88 @@
+from database.bodies import ARTICLE_BODIES_BY_IDS
+
+AUTHOR_INSERT = "INSERT INTO authors (name) VALUES (?) ON CONFLICT (name) DO NOTHING"
+AUTHOR_ID_BY_NAME = "SELECT id FROM authors WHERE name = ?"
+AUTHOR_NAME = "SELECT name FROM authors WHERE id = ?"
+AUTHOR_BY_ID = "SELECT id, name FROM authors WHERE id = ?"
+AUTHORS_BY_IDS = "SELECT id, name FROM authors WHERE id IN ({placeholders})"
+AUTHOR_IDS_BY_NAMES = "SELECT id, name FROM authors WHERE name IN ({placeholders})"
+AUTHORS_PAGE = "SELECT id, name FROM authors WHERE id > ? ORDER BY id LIMIT ?"
+ALL_AUTHORS = "SELECT id, name FROM authors ORDER BY id"
+AUTHOR_ARTICLES_PAGE = """SELECT id, title, author_id, magazine_id FROM articles
+                          WHERE author_id = ? AND id > ? ORDER BY id LIMIT ?"""
+AUTHOR_ARTICLES = "SELECT id, title, author_id, magazine_id FROM articles WHERE author_id = ? ORDER BY id"
+AUTHOR_MAGAZINES_PAGE = """SELECT id, name, category FROM magazines
+                           WHERE id IN (SELECT magazine_id FROM articles WHERE author_id = ?) AND id > ?
+                           ORDER BY id LIMIT ?"""
+AUTHOR_MAGAZINES = """SELECT id, name, category FROM magazines
+                      WHERE id IN (SELECT magazine_id FROM articles WHERE author_id = ?)
+                      ORDER BY id"""
+AUTHOR_ARTICLE_COUNT = "SELECT article_count FROM author_stats WHERE author_id = ?"
+AUTHOR_MAGAZINE_ARTICLE_COUNT = "SELECT article_count FROM author_magazine_stats WHERE author_id = ? AND magazine_id = ?"
+AUTHOR_MAGAZINE_COUNT = "SELECT magazine_count FROM author_stats WHERE author_id = ?"
+
+MAGAZINE_INSERT = "INSERT INTO magazines (name, category) VALUES (?, ?) ON CONFLICT (name) DO NOTHING"
+MAGAZINE_ID_BY_NAME = "SELECT id FROM magazines WHERE name = ?"
+MAGAZINE_NAME = "SELECT name FROM magazines WHERE id = ?"
+MAGAZINE_CATEGORY = "SELECT category FROM magazines WHERE id = ?"
+MAGAZINE_BY_ID = "SELECT id, name, category FROM magazines WHERE id = ?"
+MAGAZINES_BY_IDS = "SELECT id, name, category FROM magazines WHERE id IN ({placeholders})"
+MAGAZINE_IDS_BY_NAMES = "SELECT id, name FROM magazines WHERE name IN ({placeholders})"
+MAGAZINES_PAGE = "SELECT id, name, category FROM magazines WHERE id > ? ORDER BY id LIMIT ?"
+ALL_MAGAZINES = "SELECT id, name, category FROM magazines ORDER BY id"
+MAGAZINE_ARTICLES_PAGE = """SELECT id, title, author_id, magazine_id FROM articles
+                            WHERE magazine_id = ? AND id > ? ORDER BY id LIMIT ?"""
+MAGAZINE_ARTICLES = "SELECT id, title, author_id, magazine_id FROM articles WHERE magazine_id = ? ORDER BY id"
+MAGAZINE_CONTRIBUTORS_PAGE = """SELECT id, name FROM authors
+                                WHERE id IN (SELECT author_id FROM articles WHERE magazine_id = ?) AND id > ?
+                                ORDER BY id LIMIT ?"""
+MAGAZINE_CONTRIBUTORS = """SELECT id, name FROM authors
+                           WHERE id IN (SELECT author_id FROM articles WHERE magazine_id = ?)
+                           ORDER BY id"""
+MAGAZINE_ARTICLE_COUNT = "SELECT article_count FROM magazine_stats WHERE magazine_id = ?"
+MAGAZINE_CONTRIBUTOR_COUNT = "SELECT contributor_count FROM magazine_stats WHERE magazine_id = ?"
+MAGAZINE_ARTICLE_TITLES = "SELECT title FROM articles WHERE magazine_id = ? ORDER BY id"
+# A negative LIMIT means no limit, so one statement serves both callers.
+MAGAZINE_AUTHOR_ARTICLE_COUNTS = """SELECT authors.id, authors.name, COUNT(*) AS article_count
+                                    FROM articles
+                                    INNER JOIN authors ON authors.id = articles.author_id
+                                    WHERE articles.magazine_id = ?
+                                    GROUP BY authors.id
+                                    HAVING COUNT(*) >= ?
+                                    ORDER BY article_count DESC, authors.id
+                                    LIMIT ?"""
+
+ARTICLE_TITLE = "SELECT title FROM articles WHERE id = ?"
+ARTICLE_AUTHOR = """SELECT authors.id, authors.name FROM articles
+                    INNER JOIN authors ON articles.author_id = authors.id WHERE articles.id = ?"""
+ARTICLE_MAGAZINE = """SELECT magazines.id, magazines.name, magazines.category FROM articles
+                      INNER JOIN magazines ON articles.magazine_id = magazines.id WHERE articles.id = ?"""
+ARTICLES_PAGE = "SELECT id, title, author_id, magazine_id FROM articles WHERE id > ? ORDER BY id LIMIT ?"
+ALL_ARTICLES = "SELECT id, title, author_id, magazine_id FROM articles ORDER BY id"
+AUTHOR_MAGAZINE_ARTICLES = """SELECT id, title, author_id, magazine_id FROM articles
+                              WHERE magazine_id = ? AND author_id = ? ORDER BY id"""
+ARTICLE_SEARCH = """SELECT articles.id, articles.title, articles.author_id, articles.magazine_id,
+                           bm25(articles_fts) AS rank,
+                           snippet(articles_fts, -1, ?, ?, '...', 12)
+                    FROM articles_fts
+                    INNER JOIN articles ON articles.id = articles_fts.rowid
+                    WHERE articles_fts MATCH ?
+                    AND (? IS NULL OR articles.magazine_id = ?)
+                    AND (? IS NULL OR articles.author_id = ?)
+                    ORDER BY rank LIMIT ?"""
+
+QUERIES = {name: sql for name, sql in globals().items() if name.isupper()}
+
+# Listing every row is the point of these statements; every other query must
+# be answered from an index.
+FULL_SCANS = {"ALL_AUTHORS", "ALL_MAGAZINES", "ALL_ARTICLES"}
+
+
+def filtered_articles(magazine_id=None, author_id=None):
+    if magazine_id is not None and author_id is not None:
+        return AUTHOR_MAGAZINE_ARTICLES, (magazine_id, author_id)
+    if magazine_id is not None:
+        return MAGAZINE_ARTICLES, (magazine_id,)
+    if author_id is not None:
+        return AUTHOR_ARTICLES, (author_id,)
+    return ALL_ARTICLES, ()
@@ -0,0 +1,107 @@
+import sys
+from collections import OrderedDict, defaultdict
+
+from models.session import bound_session, session_for
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 16 * 2**20
+
+
+class QueryCache:
+    def __init__(self, conn, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.conn = conn
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._versions = defaultdict(int)
+        self._generation = 0
+        self._data_version = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def size_of(rows):
+        size = sys.getsizeof(rows)
+        for row in rows:
+            size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+        return size
+
+    def touch(self, *tables):
+        for table in tables:
+            self._versions[table] += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def _check_data_version(self):
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            if self._data_version is not None:
+                self._generation += 1
+            self._data_version = data_version
+
+    def stamp(self, tables):
+        # Taken before the query runs, so a write that lands while the rows
+        # are still streaming leaves the entry stale instead of current.
+        self._check_data_version()
+        return (self._generation,) + tuple(self._versions[table] for table in tables)
+
+    def get(self, sql, params, stamp):
+        key = (sql, tuple(params))
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != stamp:
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, sql, params, stamp, rows, size=None):
+        size = self.size_of(rows) if size is None else size
+        if size > self.max_bytes:
+            return
+        key = (sql, tuple(params))
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (stamp, rows, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        self.bytes -= self._entries.pop(key)[2]
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+        }
+
+
+def enable_query_cache(conn, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+    session = bound_session(conn)
+    if session.query_cache is None:
+        session.query_cache = QueryCache(conn, max_entries, max_bytes)
+    return session.query_cache
+
+
+def disable_query_cache(conn):
+    session_for(conn).query_cache = None
@@ -0,0 +1,18 @@
+from importlib import import_module
+
+MODELS = {
+    "Article": "models.article",
+    "Author": "models.author",
+    "Magazine": "models.magazine",
+}
+
+
+def __getattr__(name):
+    # Resolve a model on first use and cache it as a module global, so later
+    # lookups are plain attribute reads and the model modules can refer to
+    # each other without import cycles.
+    if name not in MODELS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    model = getattr(import_module(MODELS[name]), name)
+    globals()[name] = model
+    return model
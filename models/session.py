@@ -0,0 +1,135 @@
+from collections import OrderedDict
+
+from database.batch import DEFAULT_BATCH_SIZE, iter_query
+
+DEFAULT_IDENTITY_MAP_SIZE = 10000
+
+
+class DetachedError(RuntimeError):
+    pass
+
+
+class IdentityMap:
+    def __init__(self, maxsize=DEFAULT_IDENTITY_MAP_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        obj = self._entries.get(key)
+        if obj is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return obj
+
+    def add(self, key, obj):
+        self._entries[key] = obj
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def load(self, cls, row, conn):
+        key = (cls, row[0])
+        obj = self.get(key)
+        if obj is None:
+            obj = cls.from_row(row, conn)
+            self.add(key, obj)
+        return obj
+
+    def invalidate(self, cls, *ids):
+        for id in ids:
+            self._entries.pop((cls, id), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class Session:
+    def __init__(self, conn):
+        self.conn = conn
+        self.identity_map = IdentityMap()
+        self.write_behind = None
+        self.query_cache = None
+        self._cursor = None
+
+    @property
+    def cursor(self):
+        if self._cursor is None:
+            self._cursor = self.conn.cursor()
+        return self._cursor
+
+    def changed(self, *tables):
+        if self.query_cache is not None:
+            self.query_cache.touch(*tables)
+
+    def fetch_all(self, sql, params, tables):
+        cache = self.query_cache
+        if cache is None:
+            return self.cursor.execute(sql, params).fetchall()
+        stamp = cache.stamp(tables)
+        rows = cache.get(sql, params, stamp)
+        if rows is None:
+            rows = self.cursor.execute(sql, params).fetchall()
+            cache.put(sql, params, stamp, rows)
+        return rows
+
+    def iter_query(self, sql, params, tables, batch_size=DEFAULT_BATCH_SIZE):
+        cache = self.query_cache
+        if cache is None:
+            yield from iter_query(self.conn, sql, params, batch_size)
+            return
+        stamp = cache.stamp(tables)
+        rows = cache.get(sql, params, stamp)
+        if rows is not None:
+            for start in range(0, len(rows), batch_size):
+                yield rows[start:start + batch_size]
+            return
+        collected, size = [], 0
+        for batch in iter_query(self.conn, sql, params, batch_size):
+            if collected is not None:
+                collected.extend(batch)
+                size += cache.size_of(batch)
+                if size > cache.max_bytes:
+                    collected = None
+            yield batch
+        if collected is not None:
+            cache.put(sql, params, stamp, collected, size)
+
+
+def session_for(conn):
+    if conn is None:
+        raise DetachedError("Object is not bound to a connection; load related data through include")
+    session = getattr(conn, 'model_session', None)
+    if session is None:
+        session = Session(conn)
+        try:
+            conn.model_session = session
+        except AttributeError:
+            # Plain sqlite3 connections take neither attributes nor weak
+            # references, so they get a short-lived session per call instead
+            # of one pinned in a global registry.
+            pass
+    return session
+
+
+def bound_session(conn):
+    session = session_for(conn)
+    if getattr(conn, 'model_session', None) is not session:
+        raise TypeError("Connection must be opened with get_db_connection() or factory=Connection")
+    return session
+
+
+def close_session(conn):
+    if getattr(conn, 'model_session', None) is not None:
+        conn.model_session = None
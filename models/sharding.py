@@ -0,0 +1,257 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+
+from database.batch import DEFAULT_BATCH_SIZE, chunked, iter_query
+from database.bodies import load_bodies, store_articles
+from database.connection import get_db_connection
+from database.pool import ConnectionPool
+from database.sharding import allocate_ids, create_catalog_tables, create_shard_tables
+from models import queries
+from models.article import Article
+from models.author import Author
+from models.magazine import Magazine
+from models.session import session_for
+
+CATALOG_ALIAS = "catalog"
+
+# A shard can still hold rows of a magazine that moved away (a move that
+# crashed before its cleanup), so fan-out reads only the magazines placed on
+# the shard they run on.
+PLACED_ON_SHARD = f"SELECT magazine_id FROM {CATALOG_ALIAS}.shard_placements WHERE shard = ?"
+SHARD_ARTICLES = f"""SELECT id, title, author_id, magazine_id FROM articles
+                     WHERE magazine_id IN ({PLACED_ON_SHARD}) ORDER BY id"""
+SHARD_AUTHOR_ARTICLES = f"""SELECT id, title, author_id, magazine_id FROM articles
+                            WHERE author_id = ? AND magazine_id IN ({PLACED_ON_SHARD}) ORDER BY id"""
+SHARD_AUTHOR_MAGAZINES = f"""SELECT id, name, category FROM magazines
+                             WHERE id IN (SELECT magazine_id FROM articles WHERE author_id = ?)
+                             AND id IN ({PLACED_ON_SHARD}) ORDER BY id"""
+SHARD_AUTHOR_ARTICLE_COUNT = f"""SELECT COALESCE(SUM(article_count), 0) FROM author_magazine_stats
+                                 WHERE author_id = ? AND magazine_id IN ({PLACED_ON_SHARD})"""
+
+
+class ShardRouter:
+    def __init__(self, catalog, shards, pragmas=None, workers=None):
+        if not shards:
+            raise ValueError("At least one shard is required")
+        self.catalog = catalog
+        self.shards = list(shards)
+        self._create_tables(pragmas)
+        self._catalog_pool = ConnectionPool(catalog, pragmas)
+        # Authors and magazines resolve through the attached catalog, so the
+        # models work unchanged on a shard connection.
+        self._shard_pools = [ConnectionPool(shard, pragmas, {CATALOG_ALIAS: catalog}) for shard in self.shards]
+        self._executor = ThreadPoolExecutor(workers or len(self.shards), thread_name_prefix="db-shard")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _create_tables(self, pragmas):
+        conn = get_db_connection(self.catalog, pragmas)
+        create_catalog_tables(conn)
+        conn.close()
+        for shard in self.shards:
+            conn = get_db_connection(shard, pragmas)
+            create_shard_tables(conn)
+            conn.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._catalog_pool.close()
+        for pool in self._shard_pools:
+            pool.close()
+
+    def catalog_connection(self):
+        return self._catalog_pool.get()
+
+    def shard_connection(self, shard):
+        return self._shard_pools[shard].get()
+
+    def placement(self, magazine):
+        # Placements are read from the catalog on every call rather than
+        # cached, so every router follows a magazine as soon as it moves.
+        magazine_id = getattr(magazine, "id", magazine)
+        sql = "SELECT shard FROM shard_placements WHERE magazine_id = ?"
+        row = self.catalog_connection().execute(sql, (magazine_id,)).fetchone()
+        if row is None:
+            raise LookupError(f"Magazine {magazine_id} has no shard placement")
+        return row[0]
+
+    def _place(self, magazine_ids):
+        conn = self.catalog_connection()
+        sql = "INSERT INTO shard_placements (magazine_id, shard) VALUES (?, ?) ON CONFLICT (magazine_id) DO NOTHING"
+        with conn:
+            conn.executemany(sql, [(id, id % len(self.shards)) for id in magazine_ids])
+
+    def connection_for(self, magazine):
+        return self.shard_connection(self.placement(magazine))
+
+    def _fan_out(self, func, *args):
+        futures = [
+            self._executor.submit(self._call, pool, func, (shard,) + args)
+            for shard, pool in enumerate(self._shard_pools)
+        ]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _call(pool, func, args):
+        return func(pool.get(), *args)
+
+    def create_author(self, name):
+        return Author(name=name, conn=self.catalog_connection())
+
+    def create_magazine(self, name, category):
+        magazine = Magazine(name=name, category=category, conn=self.catalog_connection())
+        self._place([magazine.id])
+        return magazine
+
+    def create_article(self, title, content, author, magazine):
+        return self.bulk_create_articles([{
+            "title": title, "content": content,
+            "author_id": getattr(author, "id", author), "magazine_id": getattr(magazine, "id", magazine),
+        }])[0]
+
+    def bulk_create_articles(self, records, chunk_size=DEFAULT_BATCH_SIZE):
+        catalog = self.catalog_connection()
+        ids = []
+        for chunk in chunked(records, chunk_size):
+            rows = Article.resolve_records(catalog, chunk, chunk_size)
+            self._place({row[3] for row in rows})
+            rows_by_shard = {}
+            placements = {}
+            for id, row in zip(allocate_ids(catalog, "articles", len(rows)), rows):
+                magazine_id = row[3]
+                if magazine_id not in placements:
+                    placements[magazine_id] = self.placement(magazine_id)
+                rows_by_shard.setdefault(placements[magazine_id], []).append((id,) + row)
+                ids.append(id)
+            for shard, rows in rows_by_shard.items():
+                self._insert(self.shard_connection(shard), rows)
+        return ids
+
+    @staticmethod
+    def _insert(conn, rows):
+        with conn:
+            store_articles(conn, rows)
+        session_for(conn).changed("articles")
+
+    def magazine_articles(self, magazine, include=()):
+        return Magazine.from_id(magazine, self.connection_for(magazine)).articles(include)
+
+    def magazine_contributors(self, magazine):
+        return Magazine.from_id(magazine, self.connection_for(magazine)).contributors()
+
+    def magazine_article_count(self, magazine):
+        return Magazine.from_id(magazine, self.connection_for(magazine)).article_count()
+
+    @staticmethod
+    def _shard_articles(conn, shard, sql, params, include):
+        articles = []
+        for rows in iter_query(conn, sql, params + (shard,)):
+            articles.extend(Article.load_related(conn, Article.from_rows(rows, conn), include))
+        return articles
+
+    def author_articles(self, author, include=()):
+        params = (getattr(author, "id", author),)
+        results = self._fan_out(self._shard_articles, SHARD_AUTHOR_ARTICLES, params, include)
+        return list(heapq.merge(*results, key=lambda article: article.id))
+
+    def author_magazines(self, author):
+        author_id = getattr(author, "id", author)
+        results = self._fan_out(lambda conn, shard: Magazine.from_rows(
+            conn.execute(SHARD_AUTHOR_MAGAZINES, (author_id, shard)).fetchall(), conn
+        ))
+        return list(heapq.merge(*results, key=lambda magazine: magazine.id))
+
+    def author_article_count(self, author):
+        author_id = getattr(author, "id", author)
+        return sum(self._fan_out(
+            lambda conn, shard: conn.execute(SHARD_AUTHOR_ARTICLE_COUNT, (author_id, shard)).fetchone()[0]
+        ))
+
+    def get_all_articles(self, include=()):
+        results = self._fan_out(self._shard_articles, SHARD_ARTICLES, (), include)
+        return list(heapq.merge(*results, key=lambda article: article.id))
+
+    def shard_loads(self):
+        sql = "SELECT magazine_id, article_count FROM magazine_stats WHERE article_count > 0"
+        return self._fan_out(lambda conn, shard: dict(conn.execute(sql).fetchall()))
+
+    def _copy_articles(self, source_conn, target_conn, magazine_id, copied, batch_size):
+        for rows in iter_query(source_conn, queries.MAGAZINE_ARTICLES, (magazine_id,), batch_size):
+            rows = [row for row in rows if row[0] not in copied]
+            if rows:
+                bodies = load_bodies(source_conn, [row[0] for row in rows])
+                self._insert(target_conn, [(row[0], row[1], bodies[row[0]], row[2], row[3]) for row in rows])
+                copied.update(row[0] for row in rows)
+
+    def _purge_stale(self, magazine_id, placement):
+        for shard in range(len(self.shards)):
+            if shard != placement:
+                conn = self.shard_connection(shard)
+                with conn:
+                    deleted = conn.execute("DELETE FROM articles WHERE magazine_id = ?", (magazine_id,)).rowcount
+                if deleted:
+                    session_for(conn).changed("articles")
+
+    def move_magazine(self, magazine, target, batch_size=DEFAULT_BATCH_SIZE):
+        # Copy, switch the placement, copy whatever was written to the source
+        # meanwhile, then delete exactly the copied rows: readers see the
+        # magazine on one shard or the other, and no row is deleted before it
+        # exists on the target. A move that crashed before the switch is
+        # redone from scratch; one that crashed after it left the rows on the
+        # old shard, where readers ignore them, and repeating the move
+        # purges them. A write that read the old placement but commits after
+        # the tail copy stays on the source, so run rebalances while the
+        # magazine is idle.
+        magazine_id = getattr(magazine, "id", magazine)
+        source = self.placement(magazine_id)
+        if source == target:
+            self._purge_stale(magazine_id, target)
+            return 0
+        source_conn, target_conn = self.shard_connection(source), self.shard_connection(target)
+        copied = set()
+        with target_conn:
+            target_conn.execute("DELETE FROM articles WHERE magazine_id = ?", (magazine_id,))
+        self._copy_articles(source_conn, target_conn, magazine_id, copied, batch_size)
+        catalog = self.catalog_connection()
+        with catalog:
+            catalog.execute("UPDATE shard_placements SET shard = ? WHERE magazine_id = ?", (target, magazine_id))
+        self._copy_articles(source_conn, target_conn, magazine_id, copied, batch_size)
+        with source_conn:
+            source_conn.executemany("DELETE FROM articles WHERE id = ?", [(id,) for id in copied])
+        session_for(source_conn).changed("articles")
+        return len(copied)
+
+    def plan_rebalance(self):
+        # Repeatedly move the largest magazine that still narrows the gap
+        # between the fullest and the emptiest shard.
+        loads = self.shard_loads()
+        placements = dict(self.catalog_connection().execute("SELECT magazine_id, shard FROM shard_placements"))
+        magazines = [dict() for _ in self.shards]
+        for magazine_id, shard in placements.items():
+            if shard < len(self.shards):
+                magazines[shard][magazine_id] = loads[shard].get(magazine_id, 0)
+        totals = [sum(counts.values()) for counts in magazines]
+        moves = []
+        while True:
+            heaviest = max(range(len(totals)), key=totals.__getitem__)
+            lightest = min(range(len(totals)), key=totals.__getitem__)
+            gap = totals[heaviest] - totals[lightest]
+            candidates = [(count, id) for id, count in magazines[heaviest].items() if 0 < count < gap]
+            if not candidates:
+                return moves
+            count, magazine_id = max(candidates)
+            del magazines[heaviest][magazine_id]
+            magazines[lightest][magazine_id] = count
+            totals[heaviest] -= count
+            totals[lightest] += count
+            moves.append((magazine_id, heaviest, lightest))
+
+    def rebalance(self):
+        moves = self.plan_rebalance()
+        for magazine_id, _, target in moves:
+            self.move_magazine(magazine_id, target)
+        return moves
@@ -0,0 +1,161 @@
+import sqlite3
+import threading
+import time
+
+from database.bodies import store_articles
+from models import registry
+from models.session import bound_session, session_for
+
+DEFAULT_MAX_ROWS = 500
+DEFAULT_MAX_DELAY = 0.05
+
+
+class WriteBehindBuffer:
+    # Flushes run on the buffer's connection and commit their own
+    # transactions, so with a background flusher any transaction the
+    # foreground thread has open on that connection is committed (or rolled
+    # back on error) along with the buffered rows. Give write-behind a
+    # connection of its own, or flush explicitly before relying on one.
+    def __init__(self, conn, max_rows=DEFAULT_MAX_ROWS, max_delay=DEFAULT_MAX_DELAY, background=True):
+        self.conn = conn
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.error = None
+        self.flushes = 0
+        self._condition = threading.Condition(threading.RLock())
+        self._authors = []
+        self._magazines = []
+        self._articles = []
+        self._deadline = None
+        self._closed = False
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def __len__(self):
+        return len(self._authors) + len(self._magazines) + len(self._articles)
+
+    def enqueue_author(self, author):
+        self._enqueue(self._authors, author)
+
+    def enqueue_magazine(self, magazine):
+        self._enqueue(self._magazines, magazine)
+
+    def enqueue_article(self, article):
+        self._enqueue(self._articles, article)
+
+    def _enqueue(self, queue, obj):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Write-behind buffer is closed")
+            if self.error is not None:
+                raise self.error
+            queue.append(obj)
+            if len(self) >= self.max_rows:
+                self._flush()
+            elif self._deadline is None:
+                self._deadline = time.monotonic() + self.max_delay
+                self._condition.notify()
+
+    def flush(self):
+        with self._condition:
+            self.error = None
+            return self._flush()
+
+    def _flush(self):
+        authors, magazines, articles = self._authors, self._magazines, self._articles
+        self._authors, self._magazines, self._articles = [], [], []
+        self._deadline = None
+        if not (authors or magazines or articles):
+            return 0
+        try:
+            if authors:
+                ids = registry.Author.bulk_create(self.conn, [author._name for author in authors])
+                for author, id in zip(authors, ids):
+                    author._id = id
+            if magazines:
+                ids = registry.Magazine.bulk_create(self.conn, [(magazine._name, magazine._category) for magazine in magazines])
+                for magazine, id in zip(magazines, ids):
+                    magazine._id = id
+            if articles:
+                self._insert_articles(articles)
+        except Exception:
+            self._authors = authors + self._authors
+            self._magazines = magazines + self._magazines
+            self._articles = articles + self._articles
+            raise
+        self.flushes += 1
+        return len(authors) + len(magazines) + len(articles)
+
+    def _insert_articles(self, articles):
+        for article in articles:
+            if article.author_id is None and article._author is not None:
+                article.author_id = article._author.id
+            if article.magazine_id is None and article._magazine is not None:
+                article.magazine_id = article._magazine.id
+        rows = [(article._title, article._content, article.author_id, article.magazine_id) for article in articles]
+        with self.conn:
+            ids = store_articles(self.conn, rows)
+        for article, id in zip(articles, ids):
+            article.id = id
+        session_for(self.conn).changed("articles")
+
+    def _run(self):
+        with self._condition:
+            while not self._closed:
+                if self._deadline is None or self.error is not None:
+                    self._condition.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                try:
+                    self._flush()
+                except Exception as error:
+                    self.error = error
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+        with self._condition:
+            return self._flush()
+
+
+def _usable_from_other_threads(conn):
+    errors = []
+
+    def probe():
+        try:
+            conn.execute("SELECT 1").fetchall()
+        except sqlite3.ProgrammingError as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    return not errors
+
+
+def enable_write_behind(conn, max_rows=DEFAULT_MAX_ROWS, max_delay=DEFAULT_MAX_DELAY, background=True):
+    session = bound_session(conn)
+    if session.write_behind is None:
+        if background and not _usable_from_other_threads(conn):
+            raise ValueError("Background write-behind needs a connection opened with check_same_thread=False")
+        session.write_behind = WriteBehindBuffer(conn, max_rows, max_delay, background)
+    return session.write_behind
+
+
+def disable_write_behind(conn):
+    session = session_for(conn)
+    buffer, session.write_behind = session.write_behind, None
+    return buffer.close() if buffer is not None else 0
+
+
+def flush(conn):
+    buffer = session_for(conn).write_behind
+    return buffer.flush() if buffer is not None else 0
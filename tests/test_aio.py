@@ -0,0 +1,82 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from database.connection import get_db_connection
+from database.setup import create_tables
+from models.aio import AsyncDatabase
+from models.session import DetachedError
+
+
+class TestAsyncDatabase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'aio.db')
+        conn = get_db_connection(self.path)
+        create_tables(conn)
+        conn.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_create_and_read(self):
+        async def scenario():
+            async with AsyncDatabase(self.path, readers=2) as db:
+                author = await db.create_author("Jane Doe")
+                magazine = await db.create_magazine("Tech Review", "Technology")
+                article = await db.create_article("Article Title", "Content", author, magazine)
+                articles = await db.author_articles(author, include=("magazine",))
+                contributors = await db.magazine_contributors(magazine.id)
+                magazines = await db.author_magazines(author.id)
+                everything = await db.get_all_articles()
+            return article, articles, contributors, magazines, everything
+
+        article, articles, contributors, magazines, everything = asyncio.run(scenario())
+        self.assertEqual([a.id for a in articles], [article.id])
+        self.assertEqual(articles[0].magazine().name, "Tech Review")
+        self.assertEqual([a.name for a in contributors], ["Jane Doe"])
+        self.assertEqual([m.name for m in magazines], ["Tech Review"])
+        self.assertEqual(len(everything), 1)
+
+    def test_results_are_detached(self):
+        async def scenario():
+            async with AsyncDatabase(self.path, readers=2) as db:
+                author = await db.create_author("Jane Doe")
+                magazine = await db.create_magazine("Tech Review", "Technology")
+                await db.create_article("Article Title", "Content", author, magazine)
+                lazy = await db.get_all_articles()
+                eager = await db.get_all_articles(include=("author", "content"))
+            return author, lazy, eager
+
+        author, lazy, eager = asyncio.run(scenario())
+        self.assertIsNone(author.conn)
+        self.assertIsNone(lazy[0].conn)
+        with self.assertRaises(DetachedError):
+            lazy[0].content
+        with self.assertRaises(DetachedError):
+            lazy[0].author()
+        with self.assertRaises(DetachedError):
+            author.articles()
+        self.assertEqual(eager[0].content, "Content")
+        self.assertEqual(eager[0].author().name, "Jane Doe")
+        self.assertIsNone(eager[0].author().conn)
+
+    def test_concurrent_fan_out(self):
+        records = [
+            {"title": f"Test Title {i}", "content": "Content", "author": f"Author {i % 5}", "magazine": "Tech Review", "category": "Technology"}
+            for i in range(20)
+        ]
+
+        async def scenario():
+            async with AsyncDatabase(self.path, readers=3) as db:
+                await db.bulk_create_articles(records)
+                authors = await db.get_all_authors()
+                return await asyncio.gather(*(db.author_articles(author) for author in authors))
+
+        results = asyncio.run(scenario())
+        self.assertEqual([len(articles) for articles in results], [4] * 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
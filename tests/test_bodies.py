@@ -0,0 +1,127 @@
+import sqlite3
+import unittest
+
+from database.bodies import CODEC, create_body_table, decode_body, encode_body, store_articles
+from database.setup import create_base_tables, create_tables
+from models.article import Article
+from models.author import Author
+from models.magazine import Magazine
+
+LONG_CONTENT = "Tilapia and omena are caught at dawn on the lake. " * 40
+
+
+class TestArticleBodies(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        create_tables(self.conn)
+        self.ids = Article.bulk_create(self.conn, [
+            {"title": "Fishing on the lake", "content": LONG_CONTENT, "author": "Jane Doe", "magazine": "Outdoors", "category": "Nature"},
+            {"title": "Short article", "content": "Brief", "author": "Jane Doe", "magazine": "Outdoors", "category": "Nature"},
+        ])
+        self.statements = []
+        self.conn.set_trace_callback(self.statements.append)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_encode_round_trip(self):
+        self.assertEqual(encode_body("Brief"), ("raw", b"Brief"))
+        codec, body = encode_body(LONG_CONTENT)
+        self.assertEqual(codec, CODEC)
+        self.assertLess(len(body), len(LONG_CONTENT) // 10)
+        self.assertEqual(decode_body(codec, body), LONG_CONTENT)
+
+    def test_bodies_are_stored_outside_articles(self):
+        rows = self.conn.execute("SELECT content FROM articles ORDER BY id").fetchall()
+        self.assertEqual(rows, [("",), ("Brief",)])
+        codecs = self.conn.execute("SELECT article_id, codec FROM article_bodies").fetchall()
+        self.assertEqual(codecs, [(self.ids[0], CODEC)])
+
+    def test_content_is_loaded_lazily(self):
+        article = Article.get_all_articles(self.conn)[0]
+        del self.statements[:]
+        self.assertEqual(article.content, LONG_CONTENT)
+        self.assertEqual(article.content, LONG_CONTENT)
+        self.assertEqual(len(self.statements), 1)
+
+    def test_include_content_loads_bodies_in_one_query(self):
+        del self.statements[:]
+        articles = Article.get_all_articles(self.conn, include=("content",))
+        self.assertEqual(len(self.statements), 2)
+        self.assertEqual([article.content for article in articles], [LONG_CONTENT, "Brief"])
+        self.assertEqual(len(self.statements), 2)
+
+    def test_list_queries_do_not_read_content(self):
+        magazine = Magazine.find_by_id(self.conn, Magazine.find_ids_by_name(self.conn, ["Outdoors"])["Outdoors"])
+        del self.statements[:]
+        self.assertEqual(magazine.article_titles(), ["Fishing on the lake", "Short article"])
+        Author.find_by_id(self.conn, 1).articles()
+        self.assertFalse(any("content" in sql or "article_bodies" in sql for sql in self.statements))
+
+    def test_inline_content_takes_precedence(self):
+        self.conn.execute("UPDATE articles SET content = 'Omena' WHERE id = ?", (self.ids[0],))
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM article_bodies").fetchone()[0], 0)
+        self.assertEqual(Article.get_all_articles(self.conn)[0].content, "Omena")
+        self.assertEqual(len(Article.search(self.conn, "omena")), 1)
+
+    def test_empty_content_is_stored_inline(self):
+        ids = Article.bulk_create(self.conn, [
+            {"title": "Empty article", "content": "", "author": "Jane Doe", "magazine": "Outdoors", "category": "Nature"},
+        ])
+        self.assertIsNone(self.conn.execute("SELECT 1 FROM article_bodies WHERE article_id = ?", ids).fetchone())
+        self.assertEqual(Article.get_all_articles(self.conn, include=("content",))[-1].content, "")
+        self.assertEqual([result.article.id for result in Article.search(self.conn, "empty")], ids)
+
+    def test_missing_content_is_rejected(self):
+        with self.assertRaises(sqlite3.IntegrityError):
+            Article.bulk_create(self.conn, [
+                {"title": "No content", "content": None, "author": "Jane Doe", "magazine": "Outdoors", "category": "Nature"},
+            ])
+
+    def test_clearing_offloaded_content_drops_the_body(self):
+        self.conn.execute("UPDATE articles SET content = '' WHERE id = ?", (self.ids[0],))
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM article_bodies").fetchone()[0], 0)
+        self.assertEqual(Article.get_all_articles(self.conn)[0].content, "")
+        self.assertEqual(Article.search(self.conn, "dawn"), [])
+
+    def test_title_update_reindexes_offloaded_article(self):
+        with self.conn:
+            self.conn.execute("UPDATE articles SET title = 'Market prices' WHERE id = ?", (self.ids[0],))
+        self.assertEqual([result.article.id for result in Article.search(self.conn, "market")], self.ids[:1])
+        self.assertEqual([result.article.id for result in Article.search(self.conn, "dawn")], self.ids[:1])
+        self.assertEqual(Article.search(self.conn, "fishing"), [])
+
+    def test_writes_do_not_probe_the_schema(self):
+        del self.statements[:]
+        Article.bulk_create(self.conn, [
+            {"title": "Fishing at night", "content": LONG_CONTENT, "author": "Jane Doe", "magazine": "Outdoors", "category": "Nature"},
+        ])
+        self.assertFalse(any("sqlite_master" in sql for sql in self.statements))
+        conn = sqlite3.connect(':memory:')
+        create_base_tables(conn)
+        create_body_table(conn)
+        self.assertEqual(store_articles(conn, [("Fishing at night", LONG_CONTENT, None, None)]), [1])
+        conn.close()
+
+    def test_search_matches_offloaded_bodies(self):
+        self.assertEqual([result.article.id for result in Article.search(self.conn, "dawn")], self.ids[:1])
+        self.assertEqual([result.article.id for result in Article.search_like(self.conn, "OMENA")], self.ids[:1])
+
+    def test_migration_offloads_inline_content(self):
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE authors (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL)")
+        conn.execute("CREATE TABLE magazines (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, category TEXT NOT NULL)")
+        conn.execute("CREATE TABLE articles (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, content TEXT NOT NULL, author_id INTEGER, magazine_id INTEGER)")
+        conn.execute("INSERT INTO articles (title, content, author_id, magazine_id) VALUES ('Article 1', ?, 1, 1)", (LONG_CONTENT,))
+        conn.commit()
+        create_tables(conn)
+        self.assertEqual(conn.execute("SELECT content FROM articles").fetchone()[0], "")
+        self.assertEqual(Article.get_all_articles(conn)[0].content, LONG_CONTENT)
+        self.assertEqual(len(Article.search(conn, "dawn")), 1)
+        conn.execute("DELETE FROM articles")
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM article_bodies").fetchone()[0], 0)
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
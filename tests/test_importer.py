@@ -0,0 +1,99 @@
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from database.setup import create_tables
+from models.article import Article
+from models.author import Author
+from models.importer import import_file, load_checkpoint
+from models.magazine import Magazine
+
+
+def make_rows(count):
+    return [
+        {"title": f"Imported article {i}", "content": f"Body {i}", "author": f"Author {i % 3}",
+         "magazine": f"Magazine {i % 2}", "category": "General"}
+        for i in range(count)
+    ]
+
+
+class TestImporter(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        create_tables(self.conn)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.conn.close()
+        self.directory.cleanup()
+
+    def write_jsonl(self, rows, name="articles.jsonl"):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as output:
+            for row in rows:
+                output.write((row if isinstance(row, str) else json.dumps(row)) + "\n")
+        return path
+
+    def test_jsonl_import_deduplicates_authors_and_magazines(self):
+        path = self.write_jsonl(make_rows(10))
+        result = import_file(self.conn, path, chunk_size=4, workers=0)
+        self.assertEqual((result.imported, result.rejected), (10, 0))
+        self.assertEqual(len(Author.get_all_authors(self.conn)), 3)
+        self.assertEqual(len(Magazine.get_all_magazines(self.conn)), 2)
+        articles = Article.get_all_articles(self.conn)
+        self.assertEqual([article.title for article in articles], [f"Imported article {i}" for i in range(10)])
+        self.assertEqual(articles[4].author().name, "Author 1")
+
+    def test_invalid_rows_are_rejected_with_positions(self):
+        rows = make_rows(3)
+        rows[1]["title"] = "Bad"
+        path = self.write_jsonl(rows + ["", "{not json", json.dumps(dict(rows[0], magazine="X"))])
+        result = import_file(self.conn, path, workers=0)
+        self.assertEqual((result.imported, result.rejected), (2, 3))
+        self.assertEqual([position for position, _ in result.errors], [2, 5, 6])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0], 2)
+
+    def test_csv_import_with_process_pool(self):
+        path = os.path.join(self.directory.name, "articles.csv")
+        with open(path, "w", newline="") as output:
+            writer = csv.DictWriter(output, ["title", "content", "author", "magazine", "category"])
+            writer.writeheader()
+            for row in make_rows(7):
+                row["content"] = row["content"] + "\nwith a second line"
+                writer.writerow(row)
+        result = import_file(self.conn, path, chunk_size=2, workers=2)
+        self.assertEqual(result.imported, 7)
+        self.assertTrue(Article.get_all_articles(self.conn)[0].content.endswith("second line"))
+
+    def test_resume_from_checkpoint(self):
+        path = self.write_jsonl(make_rows(10))
+
+        def interrupt(result):
+            if result.processed >= 4:
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            import_file(self.conn, path, chunk_size=4, workers=0, progress=interrupt)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0], 4)
+
+        result = import_file(self.conn, path, chunk_size=4, workers=0)
+        self.assertEqual((result.skipped, result.imported), (4, 6))
+        titles = [article.title for article in Article.get_all_articles(self.conn)]
+        self.assertEqual(titles, [f"Imported article {i}" for i in range(10)])
+
+        self.assertEqual(import_file(self.conn, path, workers=0).imported, 0)
+        self.assertEqual(import_file(self.conn, path, resume=False, workers=0).imported, 10)
+
+    def test_restart_clears_checkpoint(self):
+        path = self.write_jsonl([])
+        with self.conn:
+            self.conn.execute("INSERT INTO import_checkpoints (source, rows) VALUES (?, 5)", (os.path.abspath(path),))
+        import_file(self.conn, path, resume=False, workers=0)
+        self.assertEqual(load_checkpoint(self.conn, os.path.abspath(path)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
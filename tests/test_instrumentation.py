@@ -0,0 +1,94 @@
+import sqlite3
+import unittest
+
+from database.connection import Connection
+from database.setup import create_tables
+from models.article import Article
+from models.author import Author
+from models.instrumentation import capture, instrumented, query_shape
+from models.magazine import Magazine
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:', factory=Connection)
+        create_tables(self.conn)
+        records = [
+            {"title": f"Test Title {i}", "content": "Content", "author": f"Author {i % 3}", "magazine": "Tech Review", "category": "Technology"}
+            for i in range(9)
+        ]
+        Article.bulk_create(self.conn, records)
+        self.magazine = Magazine.get_all_magazines(self.conn)[0]
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_query_shape(self):
+        self.assertEqual(
+            query_shape("SELECT id FROM authors WHERE id IN (1, 2, 3) AND name = 'Jane ''D'''"),
+            "SELECT id FROM authors WHERE id IN (?) AND name = ?",
+        )
+
+    def test_counts_queries_and_rows_per_method(self):
+        with capture(self.conn) as profile:
+            self.magazine.articles(include=("author",))
+            authors = self.magazine.contributing_authors()
+        self.assertEqual(len(authors), 3)
+        stats = profile.methods["Magazine.contributing_authors"]
+        self.assertEqual((stats.calls, stats.queries, stats.rows), (1, 1, 3))
+        self.assertEqual(profile.methods["Magazine.articles"].rows, 9)
+        self.assertEqual(profile.methods["Magazine.articles"].queries, 2)
+        self.assertEqual(profile.n_plus_one, [])
+        self.assertIn("Magazine.contributing_authors", profile.report())
+
+    def test_detects_n_plus_one(self):
+        @instrumented("report")
+        def report(articles):
+            return [Author.find_by_id(self.conn, article.author_id).name for article in articles]
+
+        with capture(self.conn, n_plus_one_threshold=3) as profile:
+            report(Article.get_all_articles(self.conn))
+        self.assertEqual(len(profile.n_plus_one), 1)
+        name, shape, count = profile.n_plus_one[0]
+        self.assertEqual((name, shape, count), ("report", "SELECT id, name FROM authors WHERE id = ?", 3))
+        self.assertEqual(profile.methods["Author.find_by_id"].calls, 9)
+
+    def test_counts_each_statement_once(self):
+        author = Author.find_by_id(self.conn, 1)
+        with capture(self.conn, n_plus_one_threshold=3) as profile:
+            Article(title="Trigger heavy", content="Content", author=author, magazine=self.magazine, conn=self.conn)
+        inserts = [sql for _, sql in profile.queries if sql.startswith("INSERT INTO articles ")]
+        self.assertEqual(len(inserts), 1)
+        records = [
+            {"title": f"Bulk Title {i}", "content": "Content", "author_id": author.id, "magazine_id": self.magazine.id}
+            for i in range(20)
+        ]
+        with capture(self.conn, n_plus_one_threshold=3) as profile:
+            Article.bulk_create(self.conn, records)
+        self.assertEqual(profile.n_plus_one, [])
+        self.assertLess(profile.query_count, 10)
+
+    def test_nested_capture_restores_the_outer_hook(self):
+        with capture(self.conn) as outer:
+            with capture(self.conn) as inner:
+                self.magazine.articles()
+            self.magazine.contributors()
+        self.assertEqual((outer.query_count, inner.query_count), (2, 1))
+        self.assertIsNone(self.conn.statement_hook)
+
+    def test_requires_instrumented_connection(self):
+        conn = sqlite3.connect(':memory:')
+        with self.assertRaises(TypeError):
+            with capture(conn):
+                pass
+        conn.close()
+
+    def test_no_recording_outside_capture(self):
+        with capture(self.conn) as profile:
+            pass
+        self.magazine.articles()
+        self.assertEqual(profile.query_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,37 +2,16 @@ import unittest
 from models.author import Author
 from models.article import Article
 from models.magazine import Magazine
+from models.article_table import ArticleTable
+from database.connection import Connection
+from database.setup import SCHEMA_VERSION, create_tables, rebuild_search_index, schema_version
 import sqlite3
 
 class TestModels(unittest.TestCase):
     def setUp(self):
-        self.conn = sqlite3.connect(':memory:')
+        self.conn = sqlite3.connect(':memory:', factory=Connection)
         self.cursor = self.conn.cursor()
-        self.cursor.execute("""
-            CREATE TABLE authors (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE magazines (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                category TEXT NOT NULL
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE articles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                content TEXT NOT NULL,
-                author_id INTEGER,
-                magazine_id INTEGER,
-                FOREIGN KEY (author_id) REFERENCES authors(id),
-                FOREIGN KEY (magazine_id) REFERENCES magazines(id)
-            )
-        """)
-        self.conn.commit()
+        create_tables(self.conn)
 
     def tearDown(self):
         self.conn.close()
@@ -206,5 +185,200 @@ class TestModels(unittest.TestCase):
         self.assertEqual(returned_magazine.name, "Tech Review")
         self.assertEqual(returned_magazine.category, "Technology")
 
+    def test_get_all_articles_does_not_write(self):
+        author = Author(name="Jane Doe", conn=self.conn)
+        magazine = Magazine(name="Tech Review", category="Technology", conn=self.conn)
+        Article(title="Article Title", content="Article Content", author=author, magazine=magazine, conn=self.conn)
+        articles = Article.get_all_articles(self.conn)
+        self.assertEqual(len(articles), 1)
+        self.assertEqual(articles[0].title, "Article Title")
+        self.assertEqual(articles[0].author().name, "Jane Doe")
+        count = self.cursor.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_iter_all_magazines(self):
+        self.cursor.execute("INSERT INTO magazines (name, category) VALUES ('Magazine 1', 'Category 1')")
+        self.cursor.execute("INSERT INTO magazines (name, category) VALUES ('Magazine 2', 'Category 2')")
+        self.conn.commit()
+        magazines = Magazine.iter_all_magazines(self.conn, batch_size=1)
+        self.assertEqual([magazine.name for magazine in magazines], ['Magazine 1', 'Magazine 2'])
+
+    def test_author_bulk_create(self):
+        existing = Author(name="Jane Doe", conn=self.conn)
+        ids = Author.bulk_create(self.conn, ["Jane Doe", "John Doe", "John Doe"])
+        self.assertEqual(ids[0], existing.id)
+        self.assertEqual(ids[1], ids[2])
+        self.assertEqual(len(Author.get_all_authors(self.conn)), 2)
+        with self.assertRaises(ValueError):
+            Author.bulk_create(self.conn, [""])
+
+    def test_magazine_bulk_create(self):
+        ids = Magazine.bulk_create(self.conn, [("Tech Weekly", "Technology"), ("Daily Sport", "Sports"), ("Tech Weekly", "Other")])
+        self.assertEqual(ids[0], ids[2])
+        self.assertEqual(Magazine.bulk_create(self.conn, [("Daily Sport", "Sports")] * 3), [ids[1]] * 3)
+        magazines = Magazine.get_all_magazines(self.conn)
+        self.assertEqual([(m.id, m.name, m.category) for m in magazines], [(ids[0], "Tech Weekly", "Technology"), (ids[1], "Daily Sport", "Sports")])
+        with self.assertRaises(ValueError):
+            Magazine.bulk_create(self.conn, [("T", "Technology")])
+
+    def test_article_bulk_create(self):
+        author = Author(name="Jane Doe", conn=self.conn)
+        records = [
+            {"title": "Article One", "content": "One", "author_id": author.id, "magazine": "Tech Weekly", "category": "Technology"},
+            {"title": "Article Two", "content": "Two", "author": "John Doe", "magazine": "Tech Weekly", "category": "Technology"},
+            {"title": "Article Three", "content": "Three", "author": "Jane Doe", "magazine": "Daily Sport", "category": "Sports"},
+        ]
+        ids = Article.bulk_create(self.conn, records, chunk_size=2)
+        articles = Article.get_all_articles(self.conn)
+        self.assertEqual([article.id for article in articles], ids)
+        self.assertEqual([article.author().name for article in articles], ["Jane Doe", "John Doe", "Jane Doe"])
+        self.assertEqual([article.magazine().name for article in articles], ["Tech Weekly", "Tech Weekly", "Daily Sport"])
+        with self.assertRaisesRegex(ValueError, "Invalid title 'Bad'"):
+            Article.bulk_create(self.conn, [dict(records[0], title="Bad")])
+
+    def test_create_tables_upgrades_legacy_database(self):
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE authors (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL)")
+        conn.execute("CREATE TABLE magazines (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, category TEXT NOT NULL)")
+        conn.execute("CREATE TABLE articles (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, content TEXT NOT NULL, author_id INTEGER, magazine_id INTEGER)")
+        conn.executemany("INSERT INTO authors (name) VALUES (?)", [("Jane Doe",), ("Jane Doe",)])
+        conn.executemany("INSERT INTO magazines (name, category) VALUES (?, ?)", [("Tech Weekly", "Technology"), ("Tech Weekly", "Technology")])
+        conn.execute("INSERT INTO articles (title, content, author_id, magazine_id) VALUES ('Article 1', 'Content', 2, 2)")
+        conn.execute("INSERT INTO articles (title, content, author_id, magazine_id) VALUES ('Article 2', 'Content', 42, 7)")
+        conn.commit()
+        create_tables(conn)
+        self.assertEqual(schema_version(conn), SCHEMA_VERSION)
+        self.assertEqual(conn.execute("SELECT id FROM authors").fetchall(), [(1,)])
+        self.assertEqual(conn.execute("SELECT id FROM magazines").fetchall(), [(1,)])
+        self.assertEqual(conn.execute("SELECT author_id, magazine_id FROM articles ORDER BY id").fetchall(), [(1, 1), (42, 7)])
+        with self.assertRaises(sqlite3.IntegrityError):
+            conn.execute("INSERT INTO authors (name) VALUES ('Jane Doe')")
+        conn.close()
+
+    def test_create_tables_skips_ddl_on_current_schema(self):
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        create_tables(self.conn)
+        self.assertEqual(statements, ["PRAGMA user_version"])
+
+    def test_registry_resolves_models_once(self):
+        from models import registry
+        self.assertIs(registry.Magazine, Magazine)
+        self.assertIs(registry.__dict__["Magazine"], Magazine)
+        with self.assertRaises(AttributeError):
+            registry.Unknown
+
+    def test_magazine_author_article_counts(self):
+        magazine = Magazine(name="Tech Weekly", category="Technology", conn=self.conn)
+        records = [
+            {"title": f"Test Title {i}", "content": "Content", "author": name, "magazine_id": magazine.id}
+            for i, name in enumerate(["John Doe", "John Doe", "Jane Doe", "John Doe", "Jane Doe", "Jim Doe"])
+        ]
+        Article.bulk_create(self.conn, records)
+        counts = [(author.name, count) for author, count in magazine.author_article_counts()]
+        self.assertEqual(counts, [("John Doe", 3), ("Jane Doe", 2), ("Jim Doe", 1)])
+        self.assertEqual([author.name for author in magazine.top_contributors(limit=2)], ["John Doe", "Jane Doe"])
+        self.assertEqual([author.name for author in magazine.contributing_authors(more_than=1)], ["John Doe", "Jane Doe"])
+        self.assertIsNone(magazine.contributing_authors(more_than=3))
+
+    def test_articles_do_not_write(self):
+        author = Author(name="Jane Doe", conn=self.conn)
+        magazine = Magazine(name="Tech Review", category="Technology", conn=self.conn)
+        Article(title="Article Title", content="Content", author=author, magazine=magazine, conn=self.conn)
+        author.articles()
+        magazine.articles()
+        count = self.cursor.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_eager_loading(self):
+        records = [
+            {"title": f"Test Title {i}", "content": "Content", "author": f"Author {i % 3}", "magazine": f"Magazine {i % 2}", "category": "General"}
+            for i in range(6)
+        ]
+        Article.bulk_create(self.conn, records)
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        articles = Article.get_all_articles(self.conn, include=("author", "magazine"))
+        self.assertEqual([article.author().name for article in articles], [record["author"] for record in records])
+        self.assertEqual([article.magazine().name for article in articles], [record["magazine"] for record in records])
+        self.assertEqual(len(statements), 3)
+        magazine = articles[0].magazine()
+        del statements[:]
+        issue = magazine.articles(include=("author", "magazine"))
+        self.assertEqual([article.author().name for article in issue], ["Author 0", "Author 2", "Author 1"])
+        self.assertTrue(all(article.magazine() is magazine for article in issue))
+        self.assertEqual(len(statements), 1)
+        self.conn.set_trace_callback(None)
+
+    def test_models_share_cursor(self):
+        author = Author(name="Jane Doe", conn=self.conn)
+        magazine = Magazine(name="Tech Review", category="Technology", conn=self.conn)
+        self.assertIs(author.cursor, magazine.cursor)
+        with self.assertRaises(AttributeError):
+            author.extra = True
+
+    def test_article_table(self):
+        records = [
+            {"title": f"Test Title {i}", "content": "Content", "author": f"Author {i % 2}", "magazine": "Tech Review", "category": "Technology"}
+            for i in range(5)
+        ]
+        ids = Article.bulk_create(self.conn, records)
+        table = ArticleTable.load(self.conn)
+        self.assertEqual(list(table.ids), ids)
+        self.assertEqual(table.titles, [record["title"] for record in records])
+        self.assertEqual(sorted(table.counts_by_author().values()), [2, 3])
+        magazine_table = ArticleTable.load(self.conn, magazine_id=table.magazine_ids[0])
+        self.assertEqual(len(magazine_table), 5)
+
+    def test_article_search(self):
+        records = [
+            {"title": "Fishing on the lake", "content": "Tilapia and omena are caught at dawn", "author": "Jane Doe", "magazine": "Outdoors", "category": "Nature"},
+            {"title": "Market prices rise", "content": "Tilapia prices rose sharply this week", "author": "John Doe", "magazine": "Business", "category": "Finance"},
+            {"title": "Election results", "content": "Turnout was high across the country", "author": "Jane Doe", "magazine": "Business", "category": "Finance"},
+        ]
+        ids = Article.bulk_create(self.conn, records)
+        results = Article.search(self.conn, "tilapia")
+        self.assertEqual(sorted(result.article.id for result in results), ids[:2])
+        self.assertIn("[Tilapia]", results[0].snippet)
+        business = Magazine.find_ids_by_name(self.conn, ["Business"])["Business"]
+        results = Article.search(self.conn, "tilapia", magazine_id=business)
+        self.assertEqual([result.article.title for result in results], ["Market prices rise"])
+        self.assertEqual([result.article.id for result in Article.search_like(self.conn, "Turnout")], [ids[2]])
+
+    def test_search_index_tracks_changes(self):
+        ids = Article.bulk_create(self.conn, [{"title": "Fishing on the lake", "content": "Tilapia", "author": "Jane Doe", "magazine": "Outdoors", "category": "Nature"}])
+        self.conn.execute("UPDATE articles SET content = 'Omena' WHERE id = ?", (ids[0],))
+        self.assertEqual(Article.search(self.conn, "tilapia"), [])
+        self.assertEqual(len(Article.search(self.conn, "omena")), 1)
+        self.conn.execute("DELETE FROM articles_fts")
+        rebuild_search_index(self.conn)
+        self.assertEqual(len(Article.search(self.conn, "omena")), 1)
+        self.conn.execute("DELETE FROM articles WHERE id = ?", (ids[0],))
+        self.assertEqual(Article.search(self.conn, "omena"), [])
+
+    def test_keyset_pagination(self):
+        records = [
+            {"title": f"Test Title {i}", "content": "Content", "author": f"Author {i % 3}", "magazine": f"Magazine {i % 2}", "category": "General"}
+            for i in range(7)
+        ]
+        ids = Article.bulk_create(self.conn, records)
+        first = Article.get_articles_page(self.conn, limit=3)
+        second = Article.get_articles_page(self.conn, after_id=first[-1].id, limit=3)
+        third = Article.get_articles_page(self.conn, after_id=second[-1].id, limit=3)
+        self.assertEqual([article.id for article in first + second + third], ids)
+        magazine = first[0].magazine()
+        page = magazine.articles_page(after_id=ids[0], limit=2)
+        self.assertEqual([article.id for article in page], [ids[2], ids[4]])
+        self.assertEqual([article.id for article in magazine.iter_articles(batch_size=1)], ids[0::2])
+        contributors = magazine.contributors_page(limit=2)
+        contributors += magazine.contributors_page(after_id=contributors[-1].id, limit=2)
+        self.assertEqual(contributors, magazine.contributors())
+        self.assertEqual(len(contributors), 3)
+        author = first[0].author()
+        self.assertEqual([m.name for m in author.magazines_page(limit=1)], ["Magazine 0"])
+        self.assertEqual([m.name for m in author.iter_magazines()], ["Magazine 0", "Magazine 1"])
+        self.assertEqual([a.name for a in Author.get_authors_page(self.conn, after_id=author.id)], ["Author 1", "Author 2"])
+        self.assertEqual([m.name for m in Magazine.get_magazines_page(self.conn, limit=1)], ["Magazine 0"])
+
 if __name__ == "__main__":
     unittest.main()
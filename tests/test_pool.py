@@ -0,0 +1,49 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from database.pool import ConnectionPool
+from database.setup import create_tables
+from models.author import Author
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(os.path.join(self.directory.name, 'pool.db'))
+        with self.pool.connection() as conn:
+            create_tables(conn)
+
+    def tearDown(self):
+        self.pool.close()
+        self.directory.cleanup()
+
+    def test_pragmas_applied(self):
+        with self.pool.connection() as conn:
+            self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            self.assertEqual(conn.execute('PRAGMA synchronous').fetchone()[0], 1)
+            self.assertEqual(conn.execute('PRAGMA temp_store').fetchone()[0], 2)
+
+    def test_connection_reused_per_thread(self):
+        with self.pool.connection() as first, self.pool.connection() as second:
+            self.assertIs(first, second)
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.pool.get()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], self.pool.get())
+
+    def test_checkout_commits_and_rolls_back(self):
+        with self.pool.connection() as conn:
+            author = Author(name="Jane Doe", conn=conn)
+        with self.assertRaises(RuntimeError):
+            with self.pool.connection() as conn:
+                conn.execute("INSERT INTO authors (name) VALUES ('John Doe')")
+                raise RuntimeError
+        with self.pool.connection() as conn:
+            self.assertEqual([a.id for a in Author.get_all_authors(conn)], [author.id])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import sqlite3
+import unittest
+
+from database.batch import SQLITE_MAX_VARIABLES, padded, placeholders
+from database.connection import STATEMENT_CACHE_SIZE
+from database.setup import create_tables
+from models import queries
+from models.article import Article
+from models.author import Author
+
+
+def render(sql):
+    return sql.format(placeholders=placeholders(1))
+
+
+def padded_sizes():
+    return {len(padded(range(count))) for count in range(1, SQLITE_MAX_VARIABLES + 1)}
+
+
+class TestQueries(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        create_tables(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def plan(self, sql):
+        sql = render(sql)
+        return [row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {sql}", (None,) * sql.count("?"))]
+
+    def test_hot_queries_do_not_scan_tables(self):
+        for name, sql in queries.QUERIES.items():
+            if name in queries.FULL_SCANS:
+                continue
+            with self.subTest(name):
+                scans = [
+                    step for step in self.plan(sql)
+                    if step.startswith("SCAN ") and "VIRTUAL TABLE INDEX" not in step
+                ]
+                self.assertEqual(scans, [])
+
+    def test_full_scans_are_registered_queries(self):
+        self.assertLessEqual(queries.FULL_SCANS, set(queries.QUERIES))
+
+    def test_queries_name_their_columns(self):
+        for name, sql in queries.QUERIES.items():
+            with self.subTest(name):
+                self.assertNotIn("*", sql.replace("COUNT(*)", ""))
+
+    def test_statement_cache_holds_every_query_shape(self):
+        templates = sum("{placeholders}" in sql for sql in queries.QUERIES.values())
+        shapes = len(queries.QUERIES) - templates + templates * len(padded_sizes())
+        self.assertLessEqual(shapes, STATEMENT_CACHE_SIZE)
+
+    def test_padded_rounds_up_to_a_power_of_two(self):
+        self.assertEqual(padded([1, 2, 3]), [1, 2, 3, 3])
+        self.assertEqual(padded([]), [])
+        self.assertEqual(len(padded(range(700))), SQLITE_MAX_VARIABLES)
+
+    def test_padded_lookups_return_each_row_once(self):
+        ids = Author.bulk_create(self.conn, ["Amina", "Baraka", "Chege"])
+        self.assertEqual(sorted(Author.find_by_ids(self.conn, ids)), ids)
+        self.assertEqual(Author.find_ids_by_name(self.conn, ["Amina", "Chege", "Zawadi"]), {"Amina": ids[0], "Chege": ids[2]})
+
+    def test_search_filters_share_one_statement(self):
+        Article.bulk_create(self.conn, [
+            {"title": f"Lake report {i}", "content": "Fishing at dawn", "author": f"Author {i}",
+             "magazine": "Lake Weekly", "category": "News"}
+            for i in range(3)
+        ])
+        article = Article.get_all_articles(self.conn)[0]
+        self.assertEqual(len(Article.search(self.conn, "dawn")), 3)
+        self.assertEqual(len(Article.search(self.conn, "dawn", magazine_id=article.magazine_id)), 3)
+        self.assertEqual(len(Article.search(self.conn, "dawn", author_id=article.author_id)), 1)
+        self.assertEqual(len(Article.search_like(self.conn, "dawn", author_id=article.author_id)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from database.connection import Connection, get_db_connection
+from database.setup import create_tables
+from models.article import Article
+from models.author import Author
+from models.magazine import Magazine
+from models.query_cache import QueryCache, enable_query_cache
+
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:', factory=Connection)
+        create_tables(self.conn)
+        self.cache = enable_query_cache(self.conn)
+        self.author = Author(name="Jane Doe", conn=self.conn)
+        self.magazine = Magazine(name="Tech Review", category="Technology", conn=self.conn)
+        Article(title="Article One", content="Content", author=self.author, magazine=self.magazine, conn=self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_repeated_reads_hit_cache(self):
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        for _ in range(3):
+            self.assertEqual(len(self.magazine.articles()), 1)
+            self.assertEqual(len(self.magazine.contributors()), 1)
+            self.assertEqual(len(self.author.magazines()), 1)
+        self.conn.set_trace_callback(None)
+        self.assertEqual(len([sql for sql in statements if sql.startswith("SELECT")]), 3)
+        self.assertEqual((self.cache.hits, self.cache.misses), (6, 3))
+        self.assertAlmostEqual(self.cache.stats()["hit_rate"], 6 / 9)
+
+    def test_model_writes_invalidate(self):
+        self.assertEqual(len(self.magazine.articles()), 1)
+        Article(title="Article Two", content="Content", author=self.author, magazine=self.magazine, conn=self.conn)
+        self.assertEqual(len(self.magazine.articles()), 2)
+        Article.bulk_create(self.conn, [{"title": "Article Three", "content": "", "author_id": self.author.id, "magazine_id": self.magazine.id}])
+        self.assertEqual(len(self.magazine.articles_page(limit=10)), 3)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_writes_during_iteration_are_not_cached_over(self):
+        Article(title="Article Two", content="Content", author=self.author, magazine=self.magazine, conn=self.conn)
+        Article(title="Article Three", content="Content", author=self.author, magazine=self.magazine, conn=self.conn)
+        seen = []
+        for article in self.magazine.iter_articles(batch_size=1):
+            seen.append(article.id)
+            if len(seen) == 1:
+                Article(title="Article Four", content="Content", author=self.author, magazine=self.magazine, conn=self.conn)
+        self.assertEqual(len(self.magazine.articles()), 4)
+        self.assertEqual(len(self.magazine.articles()), 4)
+
+    def test_other_connection_commit_invalidates(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.db')
+            conn = get_db_connection(path)
+            create_tables(conn)
+            enable_query_cache(conn)
+            magazine = Magazine(name="Tech Review", category="Technology", conn=conn)
+            self.assertEqual(magazine.articles(), [])
+            other = get_db_connection(path)
+            Article.bulk_create(other, [{"title": "Article One", "content": "", "author": "Jane Doe", "magazine_id": magazine.id}])
+            self.assertEqual(len(magazine.articles()), 1)
+            other.close()
+            conn.close()
+
+    def test_bounded_by_entries_and_bytes(self):
+        cache = QueryCache(self.conn, max_entries=2, max_bytes=10**6)
+        stamp = cache.stamp(("articles",))
+        for i in range(3):
+            cache.put("SELECT ?", (i,), stamp, [(i,)])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("SELECT ?", (0,), stamp))
+        self.assertEqual(cache.get("SELECT ?", (2,), stamp), [(2,)])
+        cache = QueryCache(self.conn, max_entries=10, max_bytes=QueryCache.size_of([(1,)]) * 2)
+        stamp = cache.stamp(("articles",))
+        for i in range(3):
+            cache.put("SELECT ?", (i,), stamp, [(i,)])
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+        self.assertEqual(cache.evictions, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import gc
+import sqlite3
+import unittest
+import weakref
+
+from database.connection import Connection, get_db_connection
+from database.setup import create_tables
+from models.article import Article
+from models.author import Author
+from models.magazine import Magazine
+from models.query_cache import enable_query_cache
+from models.session import IdentityMap, close_session, session_for
+
+
+class TestIdentityMap(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:', factory=Connection)
+        create_tables(self.conn)
+        self.statements = []
+        self.conn.set_trace_callback(self.statements.append)
+
+    def tearDown(self):
+        close_session(self.conn)
+        self.conn.close()
+
+    def test_lru_eviction_and_counters(self):
+        identity_map = IdentityMap(maxsize=2)
+        identity_map.add((Author, 1), "one")
+        identity_map.add((Author, 2), "two")
+        self.assertEqual(identity_map.get((Author, 1)), "one")
+        identity_map.add((Author, 3), "three")
+        self.assertIsNone(identity_map.get((Author, 2)))
+        self.assertEqual(len(identity_map), 2)
+        self.assertEqual((identity_map.hits, identity_map.misses), (1, 1))
+        self.assertEqual(identity_map.hit_rate, 0.5)
+
+    def test_repeated_resolution_is_cached(self):
+        author = Author(name="Jane Doe", conn=self.conn)
+        magazine = Magazine(name="Tech Review", category="Technology", conn=self.conn)
+        Article(title="Article Title", content="Content", author=author, magazine=magazine, conn=self.conn)
+        article = Article.get_all_articles(self.conn)[0]
+        first_author, first_magazine = article.author(), article.magazine()
+        del self.statements[:]
+        self.assertIs(article.author(), first_author)
+        self.assertIs(article.magazine(), first_magazine)
+        self.assertIs(magazine.contributors()[0], first_author)
+        self.assertIs(author.magazines()[0], first_magazine)
+        self.assertEqual(len(self.statements), 2)
+        self.assertGreaterEqual(session_for(self.conn).identity_map.hits, 4)
+
+    def test_writes_invalidate_entries(self):
+        author = Author(name="Jane Doe", conn=self.conn)
+        cached = Author.find_by_id(self.conn, author.id)
+        self.assertIs(Author.find_by_id(self.conn, author.id), cached)
+        Author.bulk_create(self.conn, ["Jane Doe"])
+        self.assertIsNot(Author.find_by_id(self.conn, author.id), cached)
+
+    def test_session_stored_on_connection(self):
+        conn = get_db_connection(':memory:')
+        self.assertIs(session_for(conn), conn.model_session)
+        conn.close()
+
+    def test_session_dies_with_connection(self):
+        conn = get_db_connection(':memory:')
+        session = weakref.ref(session_for(conn))
+        conn.close()
+        del conn
+        gc.collect()
+        self.assertIsNone(session())
+
+    def test_plain_connections_are_not_pinned(self):
+        conn = sqlite3.connect(':memory:')
+        create_tables(conn)
+        author = Author(name="Jane Doe", conn=conn)
+        self.assertEqual(Author.find_by_id(conn, author.id).name, "Jane Doe")
+        session = weakref.ref(session_for(conn))
+        gc.collect()
+        self.assertIsNone(session())
+        with self.assertRaises(TypeError):
+            enable_query_cache(conn)
+        conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
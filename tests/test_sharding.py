@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from models.sharding import ShardRouter
+
+
+class TestShardRouter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.catalog = self.path("catalog.db")
+        self.shards = [self.path(f"shard{i}.db") for i in range(3)]
+        self.router = ShardRouter(self.catalog, self.shards)
+        self.jane = self.router.create_author("Jane Doe")
+        self.john = self.router.create_author("John Doe")
+        self.magazines = [self.router.create_magazine(f"Magazine {i}", "General") for i in range(3)]
+
+    def tearDown(self):
+        self.router.close()
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def count(self, database, magazine_id=None):
+        conn = sqlite3.connect(database)
+        sql, params = "SELECT COUNT(*) FROM articles", ()
+        if magazine_id is not None:
+            sql, params = sql + " WHERE magazine_id = ?", (magazine_id,)
+        count = conn.execute(sql, params).fetchone()[0]
+        conn.close()
+        return count
+
+    def test_articles_are_stored_on_the_magazine_shard(self):
+        for i, magazine in enumerate(self.magazines):
+            self.router.create_article(f"Article {i}", "Content", self.jane, magazine)
+        self.assertEqual([self.count(shard) for shard in self.shards], [1, 1, 1])
+        self.assertEqual(self.count(self.catalog), 0)
+        for magazine in self.magazines:
+            shard = self.shards[self.router.placement(magazine)]
+            self.assertEqual(self.count(shard, magazine.id), 1)
+
+    def test_magazine_queries_use_one_shard(self):
+        magazine = self.magazines[1]
+        self.router.create_article("First article", "Content", self.jane, magazine)
+        self.router.create_article("Second article", "Content", self.john, magazine)
+        articles = self.router.magazine_articles(magazine, include=("author",))
+        self.assertEqual([article.title for article in articles], ["First article", "Second article"])
+        self.assertEqual([article.author().name for article in articles], ["Jane Doe", "John Doe"])
+        self.assertEqual([author.name for author in self.router.magazine_contributors(magazine)], ["Jane Doe", "John Doe"])
+        self.assertEqual(self.router.magazine_article_count(magazine), 2)
+
+    def test_author_queries_fan_out_and_merge(self):
+        ids = self.router.bulk_create_articles([
+            {"title": f"Article {i}", "content": "Content", "author": "Jane Doe", "magazine": f"Magazine {i % 3}", "category": "General"}
+            for i in range(6)
+        ])
+        self.assertEqual(ids, sorted(ids))
+        articles = self.router.author_articles(self.jane)
+        self.assertEqual([article.id for article in articles], ids)
+        self.assertEqual([magazine.name for magazine in self.router.author_magazines(self.jane)],
+                         ["Magazine 0", "Magazine 1", "Magazine 2"])
+        self.assertEqual(self.router.author_article_count(self.jane), 6)
+        self.assertEqual(self.router.author_articles(self.john), [])
+        self.assertEqual(len(self.router.get_all_articles()), 6)
+
+    def test_new_magazines_are_created_in_the_catalog(self):
+        self.router.bulk_create_articles([
+            {"title": "Launch issue", "content": "Content", "author": "New Author", "magazine": "New Magazine", "category": "News"},
+        ])
+        magazine = self.router.author_magazines(self.router.create_author("New Author"))[0]
+        self.assertEqual((magazine.name, magazine.category), ("New Magazine", "News"))
+        self.assertEqual(self.count(self.shards[self.router.placement(magazine)]), 1)
+
+    def test_rebalance_moves_magazines_to_new_shards(self):
+        self.router.close()
+        self.catalog = self.path("growing.db")
+        self.shards = [self.path(f"growing{i}.db") for i in range(3)]
+        self.router = ShardRouter(self.catalog, self.shards[:1])
+        self.jane = self.router.create_author("Jane Doe")
+        self.magazines = [self.router.create_magazine(f"Magazine {i}", "General") for i in range(3)]
+        records = [
+            {"title": f"Article {i}", "content": "Content", "author_id": self.jane.id, "magazine_id": self.magazines[i % 3].id}
+            for i in range(9)
+        ]
+        ids = self.router.bulk_create_articles(records)
+        self.router.close()
+
+        self.router = ShardRouter(self.catalog, self.shards)
+        moves = self.router.rebalance()
+        self.assertEqual(len(moves), 2)
+        self.assertEqual([self.count(shard) for shard in self.shards], [3, 3, 3])
+        self.assertEqual([sum(loads.values()) for loads in self.router.shard_loads()], [3, 3, 3])
+        self.assertEqual([article.id for article in self.router.author_articles(self.jane)], ids)
+        for magazine in self.magazines:
+            self.assertEqual(len(self.router.magazine_articles(magazine)), 3)
+        self.assertEqual(self.router.rebalance(), [])
+
+    def test_move_copies_articles_written_during_the_copy(self):
+        magazine = self.magazines[0]
+        source = self.router.placement(magazine)
+        target = (source + 1) % len(self.shards)
+        first = self.router.create_article("First article", "Content", self.jane, magazine)
+        other = ShardRouter(self.catalog, self.shards)
+        insert = ShardRouter._insert
+        pending, late = [None], []
+
+        def insert_then_write(conn, rows):
+            insert(conn, rows)
+            if pending:
+                pending.pop()
+                late.append(other.create_article("Late article", "Content", self.john, magazine))
+
+        with mock.patch.object(ShardRouter, "_insert", staticmethod(insert_then_write)):
+            self.assertEqual(self.router.move_magazine(magazine, target), 2)
+        self.assertEqual(self.count(self.shards[source], magazine.id), 0)
+        self.assertEqual(self.count(self.shards[target], magazine.id), 2)
+        self.assertEqual([article.id for article in self.router.magazine_articles(magazine)], [first, late[0]])
+        other.create_article("After the move", "Content", self.jane, magazine)
+        self.assertEqual(self.count(self.shards[target], magazine.id), 3)
+        other.close()
+
+    def test_crashed_move_can_be_repeated(self):
+        magazine = self.magazines[0]
+        source = self.router.placement(magazine)
+        target = (source + 1) % len(self.shards)
+        ids = [self.router.create_article(f"Article {i}", "Content", self.jane, magazine) for i in range(2)]
+        copy = ShardRouter._copy_articles
+        calls = []
+
+        def copy_then_crash(router, *args):
+            calls.append(None)
+            if len(calls) == 2:
+                raise RuntimeError("crashed")
+            copy(router, *args)
+
+        with mock.patch.object(ShardRouter, "_copy_articles", copy_then_crash):
+            with self.assertRaises(RuntimeError):
+                self.router.move_magazine(magazine, target)
+        self.assertEqual(self.router.placement(magazine), target)
+        self.assertEqual(self.count(self.shards[source], magazine.id), 2)
+        self.assertEqual([article.id for article in self.router.author_articles(self.jane)], ids)
+        self.assertEqual([article.id for article in self.router.get_all_articles()], ids)
+        self.assertEqual(len(self.router.author_magazines(self.jane)), 1)
+        self.assertEqual(self.router.author_article_count(self.jane), 2)
+
+        self.router.move_magazine(magazine, target)
+        self.assertEqual(self.count(self.shards[source], magazine.id), 0)
+        self.assertEqual(self.count(self.shards[target], magazine.id), 2)
+        self.assertEqual([article.id for article in self.router.magazine_articles(magazine)], ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
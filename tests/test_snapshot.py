@@ -0,0 +1,140 @@
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import app
+from database import snapshot as snapshot_module
+from database.connection import get_db_connection
+from database.setup import SCHEMA_VERSION, create_base_tables, create_tables, schema_version
+from database.snapshot import Snapshot, export_snapshot, import_snapshot, pyarrow
+from database.stats import check_stats
+from models.article import Article
+from models.author import Author
+from models.magazine import Magazine
+
+LONG_CONTENT = "Tilapia and omena are caught at dawn on the lake. " * 20
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(':memory:')
+        create_tables(self.conn)
+        self.ids = Article.bulk_create(self.conn, [
+            {"title": f"Test Title {i}", "content": LONG_CONTENT if i == 0 else f"Content {i}", "author": f"Author {i % 3}",
+             "magazine": f"Magazine {i % 2}", "category": "General"}
+            for i in range(7)
+        ])
+        self.conn.execute("INSERT INTO articles (title, content, author_id, magazine_id) VALUES ('Orphan article', 'Ünïcode', NULL, NULL)")
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_native_snapshot_is_readable_without_sqlite(self):
+        path = self.path("magazine.snap")
+        self.assertEqual(export_snapshot(self.conn, path, "native"), "native")
+        with Snapshot(path) as snapshot:
+            self.assertEqual(snapshot.row_count("articles"), 8)
+            self.assertEqual(list(snapshot.column("authors", "name")), ["Author 0", "Author 1", "Author 2"])
+            self.assertEqual(snapshot.column("articles", "content")[0], LONG_CONTENT)
+            self.assertEqual(list(snapshot.rows("articles"))[-1][2:], ("Ünïcode", None, None))
+            self.assertEqual(sorted(snapshot.count_by("articles", "magazine_id").values()), [3, 4])
+            magazine_id = Magazine.find_ids_by_name(self.conn, ["Magazine 0"])["Magazine 0"]
+            self.assertEqual(sum(snapshot.author_article_counts(magazine_id).values()), 4)
+
+    def test_export_reads_one_database_state(self):
+        database = self.path("live.db")
+        conn = get_db_connection(database, {"journal_mode": "WAL"})
+        create_tables(conn)
+        Article.bulk_create(conn, [
+            {"title": f"Test Title {i}", "content": f"Content {i}", "author": "Author 0", "magazine": "Magazine 0", "category": "General"}
+            for i in range(3)
+        ])
+        writer = get_db_connection(database)
+        iter_table = snapshot_module.iter_table
+
+        def insert_between_passes(conn, table, columns, batch_size):
+            yield from iter_table(conn, table, columns, batch_size)
+            if table == "articles" and columns == ["id"]:
+                with writer:
+                    writer.execute("INSERT INTO articles (title, content, author_id, magazine_id) VALUES ('Late article', 'Late', 1, 1)")
+
+        path = self.path("live.snap")
+        with mock.patch.object(snapshot_module, "iter_table", insert_between_passes):
+            export_snapshot(conn, path, "native")
+        self.assertFalse(conn.in_transaction)
+        with Snapshot(path) as snapshot:
+            self.assertEqual(snapshot.row_count("articles"), 3)
+            self.assertEqual(len(snapshot.column("articles", "id")), 3)
+            self.assertEqual(len(snapshot.column("articles", "title")), 3)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0], 4)
+        writer.close()
+        conn.close()
+
+    def test_export_leaves_a_stale_source_unmigrated(self):
+        database = self.path("legacy.db")
+        conn = sqlite3.connect(database)
+        create_base_tables(conn)
+        conn.execute("INSERT INTO articles (title, content, author_id, magazine_id) VALUES ('Legacy article', ?, NULL, NULL)", (LONG_CONTENT,))
+        conn.commit()
+        conn.close()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            app.snapshot("export", self.path("legacy.snap"), database, "native")
+        self.assertIn("schema version 0", output.getvalue())
+        conn = sqlite3.connect(database)
+        self.assertEqual(schema_version(conn), 0)
+        self.assertEqual(conn.execute("SELECT content FROM articles").fetchone()[0], LONG_CONTENT)
+        conn.close()
+        with Snapshot(self.path("legacy.snap")) as snapshot:
+            self.assertEqual(list(snapshot.column("articles", "content")), [LONG_CONTENT])
+
+    def test_import_builds_schema_after_loading(self):
+        path = self.path("magazine.snap")
+        export_snapshot(self.conn, path, "native")
+        conn = sqlite3.connect(self.path("restored.db"))
+        counts = import_snapshot(conn, path)
+        self.assertEqual(counts, {"authors": 3, "magazines": 2, "articles": 8})
+        self.assertEqual(schema_version(conn), SCHEMA_VERSION)
+        self.assertEqual(check_stats(conn), [])
+        self.assertEqual(len(Article.search(conn, "dawn")), 1)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM article_bodies").fetchone()[0], 1)
+        author = Author.find_by_id(conn, 1)
+        self.assertEqual([article.content for article in author.articles(include=("content",))][0], LONG_CONTENT)
+        self.assertEqual(Author(name="Author 9", conn=conn).id, 4)
+        with self.assertRaises(ValueError):
+            import_snapshot(conn, path)
+        conn.close()
+
+    def test_import_into_migrated_database(self):
+        path = self.path("magazine.snap")
+        export_snapshot(self.conn, path, "native")
+        conn = sqlite3.connect(':memory:')
+        create_tables(conn)
+        import_snapshot(conn, path)
+        self.assertEqual(check_stats(conn), [])
+        self.assertEqual(len(Article.search(conn, "dawn")), 1)
+        self.assertEqual(Article.get_all_articles(conn)[0].content, LONG_CONTENT)
+        conn.close()
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_arrow_round_trip(self):
+        path = self.path("arrow")
+        self.assertEqual(export_snapshot(self.conn, path, "arrow"), "arrow")
+        conn = sqlite3.connect(':memory:')
+        self.assertEqual(import_snapshot(conn, path)["articles"], 8)
+        self.assertEqual(Article.get_all_articles(conn)[0].content, LONG_CONTENT)
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import random
+import sqlite3
+import unittest
+
+from database.setup import create_tables
+from database.stats import check_stats, rebuild_stats
+from models.article import Article
+from models.author import Author
+from models.magazine import Magazine
+
+
+class TestMaterializedStats(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        create_tables(self.conn)
+        records = [
+            {"title": f"Test Title {i}", "content": "Content", "author": name, "magazine": magazine, "category": "General"}
+            for i, (name, magazine) in enumerate([
+                ("Jane Doe", "Tech Review"), ("Jane Doe", "Tech Review"), ("John Doe", "Tech Review"), ("Jane Doe", "Daily Sport"),
+            ])
+        ]
+        self.ids = Article.bulk_create(self.conn, records)
+        self.jane, self.john = Author.get_all_authors(self.conn)
+        self.tech, self.sport = Magazine.get_all_magazines(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_counts(self):
+        self.assertEqual((self.tech.article_count(), self.tech.contributor_count()), (3, 2))
+        self.assertEqual((self.sport.article_count(), self.sport.contributor_count()), (1, 1))
+        self.assertEqual((self.jane.article_count(), self.jane.magazine_count()), (3, 2))
+        self.assertEqual(self.jane.article_count(self.tech), 2)
+        self.assertEqual(self.john.article_count(self.sport.id), 0)
+        self.assertEqual(check_stats(self.conn), [])
+
+    def test_delete_and_update_maintain_counts(self):
+        self.conn.execute("DELETE FROM articles WHERE id = ?", (self.ids[2],))
+        self.assertEqual((self.tech.article_count(), self.tech.contributor_count()), (2, 1))
+        self.assertEqual((self.john.article_count(), self.john.magazine_count()), (0, 0))
+        self.conn.execute("UPDATE articles SET magazine_id = ? WHERE id = ?", (self.sport.id, self.ids[0]))
+        self.assertEqual(self.jane.article_count(self.tech), 1)
+        self.assertEqual(self.jane.article_count(self.sport), 2)
+        self.assertEqual(check_stats(self.conn), [])
+
+    def test_random_changes_stay_consistent(self):
+        generator = random.Random(7)
+        authors = [self.jane.id, self.john.id, None]
+        magazines = [self.tech.id, self.sport.id, None]
+        for i in range(200):
+            action = generator.random()
+            if action < 0.5:
+                self.conn.execute(
+                    "INSERT INTO articles (title, content, author_id, magazine_id) VALUES ('Random', '', ?, ?)",
+                    (generator.choice(authors), generator.choice(magazines)),
+                )
+            elif action < 0.75:
+                self.conn.execute("DELETE FROM articles WHERE id = (SELECT id FROM articles ORDER BY random() LIMIT 1)")
+            else:
+                self.conn.execute(
+                    "UPDATE articles SET author_id = ?, magazine_id = ? WHERE id = (SELECT id FROM articles ORDER BY random() LIMIT 1)",
+                    (generator.choice(authors), generator.choice(magazines)),
+                )
+        self.assertEqual(check_stats(self.conn), [])
+
+    def test_check_and_rebuild(self):
+        self.conn.execute("UPDATE magazine_stats SET article_count = 99")
+        self.conn.execute("DELETE FROM author_magazine_stats")
+        self.assertEqual(check_stats(self.conn), ["author_magazine_stats", "magazine_stats"])
+        rebuild_stats(self.conn)
+        self.assertEqual(check_stats(self.conn), [])
+        self.assertEqual(self.tech.article_count(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import sqlite3
+import time
+import unittest
+
+from database.connection import Connection
+from database.setup import create_tables
+from models.article import Article
+from models.author import Author
+from models.magazine import Magazine
+from models.write_behind import disable_write_behind, enable_write_behind, flush
+
+
+class TestWriteBehind(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:', check_same_thread=False, factory=Connection)
+        create_tables(self.conn)
+
+    def tearDown(self):
+        disable_write_behind(self.conn)
+        self.conn.close()
+
+    def count(self, table):
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_explicit_flush_resolves_ids(self):
+        enable_write_behind(self.conn, background=False)
+        author = Author(name="Jane Doe", conn=self.conn)
+        magazine = Magazine(name="Tech Review", category="Technology", conn=self.conn)
+        article = Article(title="Article Title", content="Content", author=author, magazine=magazine, conn=self.conn)
+        self.assertIsNone(article.id)
+        self.assertEqual(self.count("articles"), 0)
+        self.assertEqual(flush(self.conn), 3)
+        self.assertIsNotNone(author.id)
+        self.assertEqual((article.author_id, article.magazine_id), (author.id, magazine.id))
+        self.assertEqual([a.id for a in magazine.articles()], [article.id])
+
+    def test_group_commit_by_row_count(self):
+        enable_write_behind(self.conn, max_rows=3, background=False)
+        author = Author(name="Jane Doe", conn=self.conn)
+        magazine = Magazine(name="Tech Review", category="Technology", conn=self.conn)
+        Article(title="Article One", content="Content", author=author, magazine=magazine, conn=self.conn)
+        self.assertEqual(self.count("articles"), 1)
+        Article(title="Article Two", content="Content", author=author, magazine=magazine, conn=self.conn)
+        self.assertEqual(self.count("articles"), 1)
+        self.assertEqual(disable_write_behind(self.conn), 1)
+        self.assertEqual(self.count("articles"), 2)
+
+    def test_background_flush_after_delay(self):
+        buffer = enable_write_behind(self.conn, max_delay=0.01)
+        Author(name="Jane Doe", conn=self.conn)
+        deadline = time.monotonic() + 2
+        while self.count("authors") == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.count("authors"), 1)
+        self.assertEqual(len(buffer), 0)
+        self.assertIsNone(buffer.error)
+
+    def test_background_flush_needs_a_shared_connection(self):
+        conn = sqlite3.connect(':memory:', factory=Connection)
+        with self.assertRaises(ValueError):
+            enable_write_behind(conn)
+        enable_write_behind(conn, background=False)
+        disable_write_behind(conn)
+        conn.close()
+
+    def test_flush_errors_surface_on_enqueue(self):
+        buffer = enable_write_behind(self.conn, background=False)
+        buffer.error = sqlite3.OperationalError("database is locked")
+        with self.assertRaises(sqlite3.OperationalError):
+            Author(name="Jane Doe", conn=self.conn)
+        self.assertEqual(len(buffer), 0)
+        flush(self.conn)
+        Author(name="Jane Doe", conn=self.conn)
+        self.assertEqual(flush(self.conn), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()